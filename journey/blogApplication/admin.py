@@ -1,16 +1,20 @@
 from django.contrib import admin
-from .models import Post, Comment
+from .models import Post, Comment, PostViewCount, POST_SEARCH_VECTOR, COMMENT_SEARCH_VECTOR
+from .admin_scaling import CachedAuthorListFilter, CachedPublishMonthListFilter, IndexedSearchMixin
 
 # The admin.site.register(Post) code registers the Post model with the Django admin application.
 # admin.site.register(Post)
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     # The list_display attribute allows you to set the fields of your model that you want to display on the admin object list page.
     list_display = ('title', 'slug', 'author', 'publish', 'status')
     # list_filter creates a right sidebar with the fields specified in the list_filter tuple. It allows people to filter the results based on the fields included in list_filter.
     list_filter = ('status', 'created', 'publish', 'author')
     search_fields = ('title', 'body')
+    # AdminScaling: search_vector is the indexed expression used for search_fields when BLOG_ADMIN_SCALING is on.
+    search_vector = POST_SEARCH_VECTOR
+    list_select_related = ('author',)
     # prepopulated_fields attribute is used to specify the fields where the value is automatically set using the value of other fields. The slug field is populated with the value of the title field.
     prepopulated_fields = {'slug': ('title',)}
     # raw_id_fields attribute is used to specify the fields where the value is set to an input of type text instead of a select input. This is useful when there are a lot of items and you don't want to load them all in the select input.
@@ -18,9 +22,26 @@ class PostAdmin(admin.ModelAdmin):
     date_hierarchy = 'publish'
     ordering = ('status', 'publish')
 
+    # AdminScaling: In scaling mode the changelist skips the exact count of the whole table, drops the distinct-date queries of date_hierarchy and uses cached filter choices.
+    scaling_list_filter = ('status', 'created', CachedPublishMonthListFilter, CachedAuthorListFilter)
+
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'post', 'created', 'active']
     list_filter = ['active', 'created', 'updated']
-    search_fields = ['name', 'email', 'body']
\ No newline at end of file
+    search_fields = ['name', 'email', 'body']
+    search_vector = COMMENT_SEARCH_VECTOR
+    # list_select_related loads the post of each comment in the same query, so rendering Post.__str__ in the post column does not query once per row.
+    list_select_related = ['post']
+
+
+# ViewCounting: The daily read counts are written by view_counter.py, so the admin only shows them.
+@admin.register(PostViewCount)
+class PostViewCountAdmin(admin.ModelAdmin):
+    list_display = ['post', 'date', 'views']
+    list_filter = ['date']
+    list_select_related = ['post']
+    raw_id_fields = ['post']
+    readonly_fields = ['post', 'date', 'views']
+    ordering = ['-date', '-views']
@@ -0,0 +1,179 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Post
+
+# AdminScaling: This module contains the pieces of the admin "scaling mode" used for very large Post and Comment tables.
+# The mode is switched on with BLOG_ADMIN_SCALING = True in settings.py. When it is off, the admin behaves exactly like the stock Django admin.
+# The settings are read on every request rather than at import time, so they can be changed with override_settings in tests.
+
+
+def admin_scaling():
+    return getattr(settings, 'BLOG_ADMIN_SCALING', False)
+
+
+def exact_count_threshold():
+    # Below this number of estimated rows an exact COUNT(*) is cheap enough, so the paginator falls back to it.
+    return getattr(settings, 'BLOG_ADMIN_EXACT_COUNT_THRESHOLD', 10000)
+
+
+def filter_cache_timeout():
+    # Filter choices (authors, publish months) are cached for this many seconds. New authors or months show up once the cache entry expires.
+    return getattr(settings, 'BLOG_ADMIN_FILTER_CACHE_TIMEOUT', 60 * 15)
+
+
+def estimated_count(queryset):
+    '''
+    Returns the number of rows of the queryset as estimated by the PostgreSQL planner.
+    An unfiltered queryset reads reltuples from pg_class, which is kept up to date by VACUUM and ANALYZE.
+    A filtered queryset reads the "Plan Rows" estimate of EXPLAIN, so the query itself is never executed.
+    Small results and other database backends use an exact count.
+    '''
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [connection.ops.quote_name(queryset.model._meta.db_table)])
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            # The ordering does not change the number of rows, so we drop it to keep the plan simple.
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+
+    # reltuples is -1 for tables that have never been analyzed.
+    if estimate < exact_count_threshold():
+        return queryset.count()
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    '''
+    The EstimatedCountPaginator class replaces the exact COUNT(*) of the admin changelist with the planner estimate.
+    The page links are approximate on huge tables, which is acceptable for browsing.
+    '''
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        return estimated_count(self.object_list)
+
+
+class CachedAuthorListFilter(admin.SimpleListFilter):
+    '''
+    The stock author filter lists every user of the site. This filter lists only users who wrote at least one post and caches the choices.
+    '''
+
+    title = 'author'
+    parameter_name = 'author'
+
+    def lookups(self, request, model_admin):
+        def load_authors():
+            # Exists() is a semi-join on the author foreign key index, so PostgreSQL never has to make the posts distinct.
+            has_posts = Post.objects.filter(author=OuterRef('pk'))
+            return list(User.objects.filter(Exists(has_posts))
+                                    .order_by('username')
+                                    .values_list('id', 'username'))
+        return cache.get_or_set('blog:admin:authors', load_authors, filter_cache_timeout())
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author_id=self.value())
+        return queryset
+
+
+class CachedPublishMonthListFilter(admin.SimpleListFilter):
+    '''
+    The CachedPublishMonthListFilter class replaces date_hierarchy. date_hierarchy runs a distinct-date query on every changelist request, while this filter computes the months once and caches them.
+    '''
+
+    title = 'publish month'
+    parameter_name = 'publish_month'
+
+    def lookups(self, request, model_admin):
+        def load_months():
+            return [date.strftime('%Y-%m') for date in Post.objects.dates('publish', 'month', order='DESC')]
+        months = cache.get_or_set('blog:admin:publish_months', load_months, filter_cache_timeout())
+        return [(month, month) for month in months]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            start = datetime.datetime.strptime(self.value(), '%Y-%m')
+        except ValueError:
+            return queryset
+        start = timezone.make_aware(start)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        # A half-open range can use the index on publish, unlike publish__month which extracts the month of every row.
+        return queryset.filter(publish__gte=start, publish__lt=end)
+
+
+class ScalingChangeList(ChangeList):
+    '''
+    The ScalingChangeList class drops date_hierarchy, which runs a distinct-date query on every changelist request.
+    '''
+
+    def __init__(self, request, model, list_display, list_display_links, list_filter, date_hierarchy, *args):
+        super().__init__(request, model, list_display, list_display_links, list_filter, None, *args)
+
+
+class IndexedSearchMixin:
+    '''
+    The IndexedSearchMixin class is mixed into a ModelAdmin to switch it to the scaling mode when BLOG_ADMIN_SCALING is on.
+    search_fields run through a full-text search on a GIN index instead of ILIKE scans. search_vector must be the same SearchVector expression that the model indexes with GinIndex.
+    The changelist skips the exact count of the whole table, drops date_hierarchy and uses scaling_list_filter, when it is set, instead of list_filter.
+    '''
+
+    search_vector = None
+    search_config = 'english'
+    scaling_list_filter = None
+
+    @property
+    def show_full_result_count(self):
+        return not admin_scaling()
+
+    def get_list_filter(self, request):
+        if admin_scaling() and self.scaling_list_filter is not None:
+            return self.scaling_list_filter
+        return super().get_list_filter(request)
+
+    def get_changelist(self, request, **kwargs):
+        if admin_scaling():
+            return ScalingChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if admin_scaling():
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not (admin_scaling() and search_term and self.search_vector is not None):
+            return super().get_search_results(request, queryset, search_term)
+        # websearch syntax supports quoted phrases, "or" and "-word" like most search engines.
+        search_query = SearchQuery(search_term, config=self.search_config, search_type='websearch')
+        # alias() keeps the vector out of the SELECT list, so it only appears in the WHERE clause, where the GIN index serves it.
+        queryset = queryset.alias(admin_search=self.search_vector).filter(admin_search=search_query)
+        # The second value tells the admin that the results contain no duplicates, so it does not add DISTINCT.
+        return queryset, False
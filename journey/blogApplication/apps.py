@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlogapplicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogApplication'
+
+    def ready(self):
+        # Signals: Importing the signals module connects its receivers once the application registry is ready.
+        from . import signals  # noqa: F401
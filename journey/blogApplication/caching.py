@@ -0,0 +1,54 @@
+import hashlib
+import uuid
+
+import markdown
+from django.conf import settings
+from django.core.cache import cache
+
+# Caching: Markdown rendering and the sidebar queries run on every page. Their results are cached here so that readers only pay for them once, and so that the warm-up (see warmup.py) has something to prime.
+MARKDOWN_CACHE_TIMEOUT = getattr(settings, 'BLOG_MARKDOWN_CACHE_TIMEOUT', 60 * 60 * 24)
+SIDEBAR_CACHE_TIMEOUT = getattr(settings, 'BLOG_SIDEBAR_CACHE_TIMEOUT', 60 * 5)
+# Every sidebar value has its own cache entry. The key includes the sidebar version, and invalidate_sidebar() replaces the version, so all the values are dropped at once.
+SIDEBAR_VERSION_KEY = 'blog:sidebar:version'
+
+
+def is_process_local_cache():
+    '''
+    Returns True if the default cache is a LocMemCache, whose entries are only seen by the process that wrote them.
+    '''
+    return settings.CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+
+def render_markdown(text):
+    '''
+    Converts Markdown text to HTML. The result is cached under a hash of the text, so an edited post gets a new cache entry and the old one simply expires.
+    '''
+    key = f'blog:markdown:{hashlib.sha256(text.encode()).hexdigest()}'
+    html = cache.get(key)
+    if html is None:
+        html = markdown.markdown(text)
+        cache.set(key, html, MARKDOWN_CACHE_TIMEOUT)
+    return html
+
+
+def sidebar_version():
+    version = cache.get(SIDEBAR_VERSION_KEY)
+    if version is None:
+        # add() does nothing if another process set the version in the meantime, so every process ends up with the same one.
+        cache.add(SIDEBAR_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SIDEBAR_VERSION_KEY)
+    return version
+
+
+def get_sidebar_value(name, load):
+    '''
+    Returns a value of the sidebar (such as the latest posts) from the cache, calling load() to compute it when it is missing.
+    A request that loaded a value before invalidate_sidebar() stores it under the old version, so it can never bring back stale values.
+    The most commented posts are not invalidated by new comments. They catch up when the entry expires.
+    '''
+    return cache.get_or_set(f'blog:sidebar:{sidebar_version()}:{name}', load, SIDEBAR_CACHE_TIMEOUT)
+
+
+def invalidate_sidebar():
+    # The values stored under the old version are never read again and expire on their own.
+    cache.set(SIDEBAR_VERSION_KEY, uuid.uuid4().hex, None)
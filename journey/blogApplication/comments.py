@@ -0,0 +1,73 @@
+import base64
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+# CommentPagination: Comments are paginated with a keyset (also called seek) cursor instead of page numbers.
+# A page number makes the database count and skip every previous comment (OFFSET), while the cursor remembers the (created, id) of the last comment shown and continues right after it using the index.
+COMMENTS_PER_PAGE = getattr(settings, 'BLOG_COMMENTS_PER_PAGE', 20)
+COMMENTS_CACHE_TIMEOUT = getattr(settings, 'BLOG_COMMENTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def comments_cache_key(post_id):
+    return f'blog:comments:first_page:{post_id}'
+
+
+def encode_cursor(comment, position):
+    '''
+    Encodes the position after the given comment as an opaque URL-safe string.
+    position is the number of comments shown so far. It is only used to keep numbering the comments across pages.
+    '''
+    raw = f'{comment.created.isoformat()}|{comment.id}|{position}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    '''
+    Decodes a cursor created by encode_cursor() into a (created, id, position) tuple.
+    Raises ValueError if the cursor is malformed.
+    '''
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, comment_id, position = raw.split('|')
+        return datetime.datetime.fromisoformat(created), int(comment_id), int(position)
+    except (TypeError, UnicodeError, ValueError) as e:
+        raise ValueError(f'Invalid comment cursor: {cursor!r}') from e
+
+
+def get_comment_page(post, cursor=None, per_page=COMMENTS_PER_PAGE):
+    '''
+    Returns a dictionary with the active comments of the page that starts after the cursor, the position of the first comment on the page and the cursor of the next page (None on the last page).
+    '''
+    comments = post.comments.filter(active=True).order_by('created', 'id')
+    position = 0
+    if cursor:
+        created, comment_id, position = decode_cursor(cursor)
+        # Comments created at the same instant are told apart by their id, so no comment is skipped or shown twice.
+        comments = comments.filter(Q(created__gt=created) | Q(created=created, id__gt=comment_id))
+
+    # We fetch one extra comment to know whether there is a next page without counting.
+    page = list(comments[:per_page + 1])
+    next_cursor = None
+    if len(page) > per_page:
+        page = page[:per_page]
+        next_cursor = encode_cursor(page[-1], position + per_page)
+    return {'comments': page, 'offset': position, 'next_cursor': next_cursor}
+
+
+def get_first_comment_page(post):
+    '''
+    Returns the first page of comments together with the total number of active comments.
+    Both are cached per post and invalidated by the signal handlers in signals.py whenever a comment is added, moderated or deleted.
+    '''
+    def load():
+        first_page = get_comment_page(post)
+        first_page['total_comments'] = post.comments.filter(active=True).count()
+        return first_page
+    return cache.get_or_set(comments_cache_key(post.id), load, COMMENTS_CACHE_TIMEOUT)
+
+
+def invalidate_comments(post_id):
+    cache.delete(comments_cache_key(post_id))
@@ -1,8 +1,8 @@
-import markdown
 from django.contrib.syndication.views import Feed
 from django.template.defaultfilters import truncatewords_html
 from django.urls import reverse_lazy
 from .models import Post
+from .caching import render_markdown
 
 class LatestPostsFeed(Feed):
     title = 'My blog'
@@ -17,9 +17,9 @@ class LatestPostsFeed(Feed):
     def item_title(self, item):
         return item.title
 
-# In the item_description() method, we use the markdown() function to convert Markdown content to HTML and the truncatewords_html() template filter function to cut the description of posts after 30 words, avoiding unclosed HTML tags.
+# In the item_description() method, we use the render_markdown() function to convert Markdown content to HTML and the truncatewords_html() template filter function to cut the description of posts after 30 words, avoiding unclosed HTML tags.
     def item_description(self, item):
-        return truncatewords_html(markdown.markdown(item.body), 30)
+        return truncatewords_html(render_markdown(item.body), 30)
 
     def item_pubdate(self, item):
         return item.publish
\ No newline at end of file
@@ -0,0 +1,193 @@
+import datetime
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+
+from .caching import invalidate_sidebar, render_markdown
+from .models import Post
+
+# BulkIngestion: Creating posts one by one costs an INSERT for the post plus a lookup and an INSERT for each tag and tag link.
+# ingest_posts() creates a whole batch of posts with a constant number of queries: one for the authors, two for the existing slugs and tags, and one bulk INSERT each for the posts, the new tags and the tag links.
+# The derived data is filled in during the ingest: PostgreSQL updates the search indexes with the INSERT, and the Markdown HTML of each post is rendered into the cache.
+# bulk_create() sends no post_save signals, so the sidebar is invalidated once per batch instead. Both cache updates only reach the web server processes if they share the cache (see CACHES in settings.py).
+
+SLUG_MAX_LENGTH = Post._meta.get_field('slug').max_length
+
+
+def parse_publish(value):
+    if value is None:
+        return timezone.now()
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'publish is not an ISO 8601 date: {value!r}') from None
+    if not isinstance(value, datetime.datetime):
+        raise ValueError(f'publish must be an ISO 8601 string, not {value!r}')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def parse_status(value):
+    # Both the stored values ('PB', 'DF') and the names ('published', 'draft') are accepted.
+    if value is None:
+        return Post.Status.PUBLISHED
+    if value in Post.Status.values:
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f'Unknown post status: {value!r}')
+    try:
+        return Post.Status[value.upper()]
+    except KeyError:
+        raise ValueError(f'Unknown post status: {value!r}') from None
+
+
+def clean_record(record):
+    '''
+    Checks a record and returns it with every field present and converted: publish becomes a datetime, status a Post.Status value and slug a valid slug.
+    Raises ValueError if a field is missing or has the wrong type.
+    '''
+    if not isinstance(record, dict):
+        raise ValueError('A post must be a JSON object.')
+    for field in ('title', 'body', 'author'):
+        if not isinstance(record.get(field), str) or not record[field].strip():
+            raise ValueError(f'{field} is required and must be a non-empty string.')
+    tags = record.get('tags', [])
+    if not isinstance(tags, list) or not all(isinstance(name, str) and name for name in tags):
+        raise ValueError('tags must be a list of non-empty strings.')
+    slug = record.get('slug')
+    if slug is not None and not isinstance(slug, str):
+        raise ValueError('slug must be a string.')
+    return {
+        'title': record['title'],
+        'body': record['body'],
+        'author': record['author'],
+        # A title without any letter or digit (only emoji or punctuation, for example) has an empty slug, which no URL would match.
+        'slug': slugify(slug or record['title'])[:SLUG_MAX_LENGTH] or 'post',
+        'tags': tags,
+        'publish': parse_publish(record.get('publish')),
+        'status': parse_status(record.get('status')),
+    }
+
+
+def unique_slug(slug, taken):
+    '''
+    Returns slug, or slug with a -2, -3... suffix, so that it is not in taken. The chosen slug is added to taken.
+    '''
+    candidate = slug
+    number = 2
+    while candidate in taken:
+        suffix = f'-{number}'
+        candidate = f'{slug[:SLUG_MAX_LENGTH - len(suffix)]}{suffix}'
+        number += 1
+    taken.add(candidate)
+    return candidate
+
+
+def resolve_authors(usernames):
+    authors = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    missing = set(usernames) - authors.keys()
+    if missing:
+        raise ValueError(f'Unknown authors: {", ".join(sorted(missing))}')
+    return authors
+
+
+def resolve_tags(names):
+    '''
+    Returns a dictionary that maps each tag name to the id of its Tag, creating the missing tags with one bulk INSERT.
+    '''
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in tags]
+    if missing:
+        # Like taggit, a slug that is already used gets a _1, _2... suffix.
+        slugs = {name: slugify(name) for name in missing}
+        taken = set(Tag.objects.filter(slug__in=slugs.values()).values_list('slug', flat=True))
+        new_tags = []
+        for name in missing:
+            slug = slugs[name]
+            number = 1
+            while slug in taken:
+                slug = f'{slugs[name]}_{number}'
+                number += 1
+            taken.add(slug)
+            new_tags.append(Tag(name=name, slug=slug))
+        # ignore_conflicts skips tags created by another process in the meantime. Their ids are read back with the others below.
+        Tag.objects.bulk_create(new_tags, ignore_conflicts=True)
+        tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return tags
+
+
+def ingest_batch(records):
+    '''
+    Creates the posts described by records in one transaction and returns them. The records must have been checked with clean_record().
+    '''
+    authors = resolve_authors({record['author'] for record in records})
+
+    posts = []
+    for record in records:
+        posts.append(Post(
+            title=record['title'],
+            slug=record['slug'],
+            author_id=authors[record['author']],
+            body=record['body'],
+            publish=record['publish'],
+            status=record['status'],
+        ))
+
+    with transaction.atomic():
+        # unique_for_date: The slugs already used on the publish dates of the batch are loaded with one query, and the collisions are solved in memory.
+        dates = {timezone.localdate(post.publish) for post in posts}
+        first_day = timezone.make_aware(datetime.datetime.combine(min(dates), datetime.time.min))
+        last_day = timezone.make_aware(datetime.datetime.combine(max(dates) + datetime.timedelta(days=1), datetime.time.min))
+        taken = {}
+        for publish, slug in Post.objects.filter(publish__gte=first_day, publish__lt=last_day).values_list('publish', 'slug'):
+            taken.setdefault(timezone.localdate(publish), set()).add(slug)
+        for post in posts:
+            post.slug = unique_slug(post.slug, taken.setdefault(timezone.localdate(post.publish), set()))
+
+        # PostgreSQL returns the ids of the inserted rows, so the posts can be linked to their tags right away.
+        # The full-text search indexes (see models.py) are expression indexes that PostgreSQL updates during this INSERT.
+        Post.objects.bulk_create(posts)
+
+        tag_names = {name for record in records for name in record['tags']}
+        if tag_names:
+            tags = resolve_tags(tag_names)
+            content_type = ContentType.objects.get_for_model(Post)
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=post.id, tag_id=tags[name])
+                for post, record in zip(posts, records)
+                for name in set(record['tags'])
+            ], ignore_conflicts=True)
+
+    # The Markdown HTML is rendered now and stored in the cache, so the first readers of the new posts do not pay for it.
+    for post in posts:
+        render_markdown(post.body)
+    invalidate_sidebar()
+    return posts
+
+
+def ingest_cleaned_posts(records, batch_size=1000):
+    '''
+    Creates posts from an iterable of records already checked with clean_record(), batch_size posts at a time, and returns the number of posts created.
+    Each batch is committed on its own, so a failing record only rolls back its own batch.
+    '''
+    records = iter(records)
+    total = 0
+    while batch := list(islice(records, batch_size)):
+        total += len(ingest_batch(batch))
+    return total
+
+
+def ingest_posts(records, batch_size=1000):
+    '''
+    Like ingest_cleaned_posts(), but checks each record with clean_record() first.
+    Each record is a dictionary with title, body and author (a username), and optionally slug, tags (a list of names), publish (a datetime or an ISO 8601 string) and status.
+    Raises ValueError if a record is invalid. The batches before it stay committed.
+    '''
+    return ingest_cleaned_posts(map(clean_record, records), batch_size)
@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blogApplication.prerender import render_page
+
+
+class Command(BaseCommand):
+    help = ('Measures the per-request latency of a page with and without the database connection pool. '
+            'The connection is closed after every request, like Django does at the end of a real request. '
+            'The difference between the two modes is the cost of opening a connection.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/blog/', help='Page to request.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of measured requests for each mode.')
+        parser.add_argument('--warmup', type=int, default=20, help='Number of requests made before measuring.')
+        parser.add_argument('--host', default='localhost',
+                            help='Host name sent with the requests. It must be in ALLOWED_HOSTS.')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        pool_options = connection.settings_dict.get('POOL')
+        if not pool_options:
+            raise CommandError(f"The '{options['database']}' database has no POOL settings.")
+
+        # Only the sidebar and the Markdown are cached, so every request still runs the queries of the page itself (for /blog/: the count, the page of posts and their tags).
+        # The numbers are the full request latency. The connection cost is the difference between the two modes, not either number on its own.
+        # render_page() marks the requests as prerendered, so the benchmark requests are not counted as reads.
+        means = []
+        try:
+            for label, pool in (('without pool', None), ('with pool', pool_options)):
+                # Each mode starts without open connections, so the pooled mode does not reuse connections opened earlier.
+                getattr(connection, 'close_pool', connection.close)()
+                connection.settings_dict['POOL'] = pool
+                timings = []
+                for number in range(options['warmup'] + options['requests']):
+                    start = time.perf_counter()
+                    response = render_page(options['url'], options['host'])
+                    connection.close()
+                    elapsed = time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise CommandError(f"{options['url']} returned HTTP {response.status_code}.")
+                    if number >= options['warmup']:
+                        timings.append(elapsed * 1000)
+                self.report(label, timings)
+                means.append(statistics.mean(timings))
+        finally:
+            getattr(connection, 'close_pool', connection.close)()
+            connection.settings_dict['POOL'] = pool_options
+        self.stdout.write(f'Saved by the pool: {means[0] - means[1]:.2f} ms per request (difference of the means).')
+
+    def report(self, label, timings):
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(f'{label:>12}: mean {statistics.mean(timings):7.2f} ms, '
+                          f'p50 {percentiles[49]:7.2f} ms, p95 {percentiles[94]:7.2f} ms, '
+                          f'p99 {percentiles[98]:7.2f} ms')
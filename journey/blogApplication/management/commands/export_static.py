@@ -0,0 +1,213 @@
+import hashlib
+import json
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+import django
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count, Max
+from django.urls import reverse
+from taggit.models import TaggedItem
+
+from blogApplication.models import Post
+from blogApplication.prerender import render_page
+from blogApplication.views import POSTS_PER_PAGE
+
+# StaticExport: The manifest is stored in the output directory. It remembers a signature of every exported post and the content hash of every file written.
+# It also lists the shared groups (lists, feed, sitemap, tag pages) that failed to render, so the next run renders them again.
+MANIFEST_NAME = '.manifest.json'
+
+
+def render_url(url, host):
+    '''
+    Renders a URL through the middleware and the view, like a browser request would, and returns what is needed to write the file.
+    This function runs in the worker processes of the process pool, so it must live at module level to be picklable.
+    '''
+    response = render_page(url, host)
+    return url, response.status_code, response.get('Content-Type', ''), response.content
+
+
+def output_path(url, content_type):
+    '''
+    Maps a URL to a file path inside the output directory.
+    /blog/2024/3/24/my-post/ becomes blog/2024/3/24/my-post/index.html and /blog/?page=2 becomes blog/page/2/index.html.
+    '''
+    path, _, query = url.partition('?')
+    path = path.lstrip('/')
+    page = parse_qs(query).get('page')
+    if page:
+        path = f'{path}page/{page[0]}/'
+    extension = 'xml' if 'xml' in content_type else 'html'
+    return os.path.join(path, f'index.{extension}')
+
+
+def paginated_urls(url, total):
+    '''
+    Returns the URLs of every page of a paginated list with the given number of posts. The first page is the URL itself.
+    '''
+    pages = max(1, math.ceil(total / POSTS_PER_PAGE))
+    return [url] + [f'{url}?page={number}' for number in range(2, pages + 1)]
+
+
+class Command(BaseCommand):
+    help = ('Exports the published blog (post pages, list pages, tag pages, feed and sitemap) to static files. '
+            'Only the pages affected by post, comment or tag changes since the last run are rendered again, '
+            'and files whose content did not change are never rewritten. '
+            'Paginated lists are written to page/<number>/index.html, so the web server must rewrite ?page=<number> to that path.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to write the static files to.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of processes used to render the pages. With 1, the pages are rendered in this process.')
+        parser.add_argument('--full', action='store_true',
+                            help='Render every page, for example after a template change. '
+                                 'The sidebar and the similar posts of a page are only refreshed when the page itself is rendered.')
+        parser.add_argument('--host', default='localhost',
+                            help='Host name sent with the rendering requests. It must be in ALLOWED_HOSTS.')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        manifest = {'posts': {}, 'files': {}, 'retry': []}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        posts = self.post_snapshots()
+        old_posts = manifest['posts']
+        retry = manifest.get('retry', [])
+
+        # Groups of URLs to render. A group is the unit of rebuilding: when a group is rendered again, its files that are no longer produced are deleted.
+        groups = {}
+        changed_tags = set()
+        for post_id, snapshot in posts.items():
+            old = old_posts.get(post_id)
+            if options['full'] or old is None or old['signature'] != snapshot['signature']:
+                groups[f'post:{post_id}'] = [snapshot['url']]
+                changed_tags.update(snapshot['tags'])
+                if old:
+                    changed_tags.update(old['tags'])
+        for post_id in old_posts.keys() - posts.keys():
+            # The post was deleted or unpublished, so its page is removed.
+            groups[f'post:{post_id}'] = []
+            changed_tags.update(old_posts[post_id]['tags'])
+
+        changed_tags.update(group.partition(':')[2] for group in retry if group.startswith('tag:'))
+
+        if groups or retry or options['full'] or not manifest['files']:
+            groups['list'] = paginated_urls(reverse('blogApplication:post_list'), len(posts))
+            groups['feed'] = [reverse('blogApplication:post_feed')]
+            groups['sitemap'] = [reverse('django.contrib.sitemaps.views.sitemap')]
+            for slug in changed_tags:
+                total = Post.published.filter(tags__slug=slug).count()
+                url = reverse('blogApplication:post_list_by_tag', args=[slug])
+                groups[f'tag:{slug}'] = paginated_urls(url, total) if total else []
+
+        url_groups = {url: group for group, urls in groups.items() for url in urls}
+        old_files = manifest['files']
+        new_files = {path: entry for path, entry in old_files.items() if entry['group'] not in groups}
+        written = 0
+        failed_groups = set()
+
+        if url_groups:
+            render = partial(render_url, host=options['host'])
+            if options['workers'] > 1:
+                # Database connections must not be shared with the forked worker processes, so we close them before the pool starts.
+                # With the pooled backend, close() would only return the connection to the pool, so the pool itself is closed.
+                for connection in connections.all():
+                    getattr(connection, 'close_pool', connection.close)()
+                executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup)
+                results = executor.map(render, url_groups, chunksize=8)
+            else:
+                # With a single worker the pages are rendered in this process, which saves the fork and the new database connections.
+                executor = None
+                results = map(render, url_groups)
+            try:
+                for url, status, content_type, content in results:
+                    if status != 200:
+                        self.stderr.write(f'Skipping {url}: HTTP {status}')
+                        failed_groups.add(url_groups[url])
+                        continue
+                    path = output_path(url, content_type)
+                    sha256 = hashlib.sha256(content).hexdigest()
+                    new_files[path] = {'sha256': sha256, 'group': url_groups[url]}
+                    full_path = os.path.join(output_dir, path)
+                    if old_files.get(path, {}).get('sha256') == sha256 and os.path.exists(full_path):
+                        continue
+                    self.write_file(full_path, content)
+                    written += 1
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        for group in failed_groups:
+            # The files of a failed group are kept as they were, so the site keeps serving the last good version.
+            for path, entry in old_files.items():
+                if entry['group'] == group:
+                    new_files.setdefault(path, entry)
+            kind, _, post_id = group.partition(':')
+            if kind == 'post':
+                # The old signature is kept (or the post is left out of the manifest), so the next run sees the post as changed and renders it again.
+                if post_id in old_posts:
+                    posts[post_id] = old_posts[post_id]
+                else:
+                    del posts[post_id]
+        retry = sorted(group for group in failed_groups if not group.startswith('post:'))
+
+        removed = 0
+        for path in old_files.keys() - new_files.keys():
+            full_path = os.path.join(output_dir, path)
+            if os.path.exists(full_path):
+                os.remove(full_path)
+                removed += 1
+
+        manifest = {'posts': posts, 'files': new_files, 'retry': retry}
+        self.write_file(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(url_groups)} pages, wrote {written} files, removed {removed} files.'))
+        if failed_groups:
+            self.stderr.write(f'{len(failed_groups)} groups failed and will be rendered again on the next run.')
+
+    def post_snapshots(self):
+        '''
+        Returns the URL, tags and change signature of every published post.
+        The signature covers Post.updated, the comments (last update and number, so added, moderated and deleted comments are all noticed) and the tag slugs.
+        Two queries are used no matter how many posts there are.
+        '''
+        tags = defaultdict(list)
+        tagged_items = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+        for object_id, slug in tagged_items.values_list('object_id', 'tag__slug'):
+            tags[object_id].append(slug)
+
+        posts = Post.published.only('id', 'slug', 'publish', 'updated').annotate(
+            comments_updated=Max('comments__updated'),
+            comments_count=Count('comments'),
+        )
+        snapshots = {}
+        for post in posts:
+            post_tags = sorted(tags[post.id])
+            signature = '|'.join([post.updated.isoformat(),
+                                  post.comments_updated.isoformat() if post.comments_updated else '',
+                                  str(post.comments_count),
+                                  ','.join(post_tags)])
+            # JSON object keys are strings, so the post ids are stored as strings as well.
+            snapshots[str(post.id)] = {
+                'url': post.get_absolute_url(),
+                'tags': post_tags,
+                'signature': hashlib.sha256(signature.encode()).hexdigest(),
+            }
+        return snapshots
+
+    def write_file(self, path, content):
+        # The file is written next to its final path and then renamed, so the web server never serves a half-written file.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'wb') as output_file:
+            output_file.write(content)
+        os.replace(temporary_path, path)
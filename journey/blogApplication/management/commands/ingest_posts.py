@@ -0,0 +1,47 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blogApplication.caching import is_process_local_cache
+from blogApplication.ingest import clean_record, ingest_cleaned_posts
+
+
+class Command(BaseCommand):
+    help = ('Creates posts in bulk from a JSON Lines file, one post per line, for example: '
+            '{"title": "...", "body": "...", "author": "username", "tags": ["django", "python"], '
+            '"publish": "2024-03-24T18:00:00", "status": "published"}. '
+            'Use - to read from standard input. Every line is checked before it is created, and the batches '
+            'before an invalid line stay committed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file with the posts, or - for standard input.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of posts created and committed together.')
+
+    def handle(self, *args, **options):
+        if is_process_local_cache():
+            self.stderr.write(self.style.WARNING(
+                'The default cache is a per-process LocMemCache, so the rendered Markdown and the sidebar '
+                'invalidation do not reach the web server processes. Use a shared cache backend in production.'))
+        input_file = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            records = (self.parse(number, line) for number, line in enumerate(input_file, 1) if line.strip())
+            # parse() already checked every record, so they are not checked again.
+            total = ingest_cleaned_posts(records, options['batch_size'])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+        self.stdout.write(self.style.SUCCESS(f'Created {total} posts.'))
+
+    def parse(self, number, line):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Line {number} is not valid JSON: {e}') from e
+        try:
+            return clean_record(record)
+        except ValueError as e:
+            raise CommandError(f'Line {number}: {e}') from e
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.urls import reverse
+
+from blogApplication.caching import is_process_local_cache
+from blogApplication.models import Post
+from blogApplication.prerender import prerender_token
+from blogApplication.warmup import WARMUP_BASE_URL, WARMUP_CONCURRENCY, WARMUP_DELAY, warm_urls
+
+
+class Command(BaseCommand):
+    help = ('Warms the caches after a deploy or a cache flush. Requests post_list, the feed, the sitemap '
+            'and the pages of the latest and the most commented published posts from the running site. '
+            'The web server processes must share their cache for every reader to benefit.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=50,
+                            help='Number of latest posts and of most commented posts to warm.')
+        parser.add_argument('--concurrency', type=int, default=WARMUP_CONCURRENCY,
+                            help='Number of pages requested at the same time.')
+        parser.add_argument('--delay', type=float, default=WARMUP_DELAY,
+                            help='Pause in seconds after each page.')
+        parser.add_argument('--base-url', default=WARMUP_BASE_URL,
+                            help='Address of the running site, for example https://blog.example.com.')
+
+    def handle(self, *args, **options):
+        if is_process_local_cache():
+            self.stderr.write(self.style.WARNING(
+                'The default cache is a per-process LocMemCache, so only the web server processes that answer '
+                'the warm-up requests are warmed. Use a shared cache backend in production.'))
+        top = options['top']
+        posts = Post.published.only('slug', 'publish')
+        latest = posts.order_by('-publish')[:top]
+        most_commented = posts.annotate(total_comments=Count('comments')).order_by('-total_comments', '-publish')[:top]
+
+        urls = [
+            reverse('blogApplication:post_list'),
+            reverse('blogApplication:post_feed'),
+            reverse('django.contrib.sitemaps.views.sitemap'),
+        ]
+        # dict.fromkeys() removes the posts that are both recent and much commented while keeping the order.
+        urls += dict.fromkeys(post.get_absolute_url() for post in [*latest, *most_commented])
+
+        statuses = warm_urls(urls, options['concurrency'], options['base_url'], options['delay'])
+        for url, status in statuses.items():
+            if status is None:
+                self.stderr.write(f'{url}: the site could not be reached')
+            elif status != 200:
+                self.stderr.write(f'{url}: HTTP {status}')
+        if not prerender_token():
+            self.stderr.write(self.style.WARNING(
+                f'Skipped {len(urls) - len(statuses)} post pages, because BLOG_PRERENDER_TOKEN is not set '
+                'and their requests would be counted as reads.'))
+        warmed = sum(status == 200 for status in statuses.values())
+        self.stdout.write(self.style.SUCCESS(f'Warmed {warmed} of {len(statuses)} pages.'))
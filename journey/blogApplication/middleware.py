@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.urls import Resolver404, resolve
+
+# FastPath: Most requests are anonymous readers of public blog pages. For them there is no session to load, no user to resolve and no message to show.
+# AnonymousFastPathMiddleware marks these requests with request.blog_fast_path = True, and the session, authentication and message middleware below skip their work for marked requests.
+# Requests with a session cookie (logged-in users, the admin), POST requests and views not listed in BLOG_FAST_PATH_VIEWS always take the normal path.
+# So do requests with a CSRF cookie: the reader asked for a token to comment, so the forms of the page are rendered with it.
+FAST_PATH_METHODS = ('GET', 'HEAD')
+
+
+async def _anonymous_user():
+    return AnonymousUser()
+
+
+class AnonymousFastPathMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'BLOG_ANONYMOUS_FAST_PATH', False)
+        self.views = set(getattr(settings, 'BLOG_FAST_PATH_VIEWS', []))
+
+    def __call__(self, request):
+        request.blog_fast_path = self.enabled and self.is_public_anonymous_request(request)
+        return self.get_response(request)
+
+    def is_public_anonymous_request(self, request):
+        if request.method not in FAST_PATH_METHODS:
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES or settings.CSRF_COOKIE_NAME in request.COOKIES:
+            return False
+        try:
+            # The URL is resolved here because the session middleware runs before Django resolves the view. The resolver caches its patterns, so this is cheap.
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in self.views
+
+
+class SessionMiddleware(sessions_middleware.SessionMiddleware):
+
+    def process_request(self, request):
+        if not getattr(request, 'blog_fast_path', False):
+            super().process_request(request)
+
+    def process_response(self, request, response):
+        if getattr(request, 'blog_fast_path', False):
+            return response
+        return super().process_response(request, response)
+
+
+class AuthenticationMiddleware(auth_middleware.AuthenticationMiddleware):
+
+    def process_request(self, request):
+        if getattr(request, 'blog_fast_path', False):
+            # A request without a session cookie can only be anonymous, so the user is known without a lazy lookup.
+            request.user = AnonymousUser()
+            request.auser = _anonymous_user
+            return
+        super().process_request(request)
+
+
+class MessageMiddleware(messages_middleware.MessageMiddleware):
+
+    def process_request(self, request):
+        # Without request._messages, the messages context processor returns an empty list and process_response() has nothing to store.
+        if not getattr(request, 'blog_fast_path', False):
+            super().process_request(request)
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-19 09:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # AdminScaling: CREATE INDEX CONCURRENTLY builds the indexes without blocking writes to large Post and Comment tables. It cannot run inside a transaction, so the migration is not atomic.
+    atomic = False
+
+    dependencies = [
+        ('blogApplication', '0004_post_tags'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['-publish'], name='blog_post_publish_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'body', config='english'), name='blog_post_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'email', 'body', config='english'), name='blog_comment_search_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-19 10:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CommentPagination: The index is built with CREATE INDEX CONCURRENTLY, so writes to a large Comment table are not blocked. It cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('blogApplication', '0005_post_indexes_comment_search_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='blog_comment_post_page_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.0.3 on 2026-10-19 11:20
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # POSTGRES_SEARCH: post_search uses TrigramSimilarity, which needs the pg_trgm extension. Installing it in a migration also installs it in the test database.
+    dependencies = [
+        ('blogApplication', '0006_comment_blog_comment_post_page_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
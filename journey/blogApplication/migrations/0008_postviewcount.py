@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-19 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogApplication', '0007_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_counts', to='blogApplication.post')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='blogApplica_date_4f16aa_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'date'), name='blog_post_view_count_unique')],
+            },
+        ),
+    ]
@@ -6,6 +6,14 @@ from django.urls import reverse
 # Taggit is a reusable Django application that allows you to add metadata to your models. We will use it to add tags to our posts. Install Taggit using pip install django-taggit.
 from taggit.managers import TaggableManager
 
+# AdminScaling: GinIndex and SearchVector let PostgreSQL answer full-text searches from an index instead of scanning every row with ILIKE '%...%'.
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+
+# AdminScaling: The search vectors are defined once so that the GIN indexes below and the admin search queries compile to exactly the same expression. PostgreSQL only uses an expression index when the query repeats the indexed expression.
+POST_SEARCH_VECTOR = SearchVector('title', 'body', config='english')
+COMMENT_SEARCH_VECTOR = SearchVector('name', 'email', 'body', config='english')
+
 # The default manager for models is objects. We can create custom managers for our models. Custom managers are useful when we want to put custom methods in the manager and make those methods available to the model objects. We can also use custom managers to modify the initial QuerySet that the manager returns. For example, we can use a custom manager to return only the published posts from the database.
 class PublishedManager(models.Manager):
 # The PublishedManager class is inheriting from models.Manager. We are overriding the get_queryset method of the manager to return a QuerySet that contains only the published posts. We use the super() method to get the initial QuerySet of the model.
@@ -52,6 +60,11 @@ class Post(models.Model):
     
     class Meta:
         ordering = ('-publish',)
+        indexes = [
+            # AdminScaling: The index on publish serves the default ordering and the publish month filter of the admin.
+            models.Index(fields=['-publish'], name='blog_post_publish_idx'),
+            GinIndex(POST_SEARCH_VECTOR, name='blog_post_search_idx'),
+        ]
         # db_table can be used here to specify a custom table name for the model.
         # default_manager_name can be used here to specify the default manager for the model. Otherwise, the first manager in the model is the default manager.
 
@@ -97,8 +110,35 @@ class Comment(models.Model):
         ordering = ['created']
         indexes = [
             models.Index(fields=['created']),
+            # CommentPagination: The keyset cursor reads the comments of one post in (created, id) order, which this index returns without sorting.
+            models.Index(fields=['post', 'created', 'id'], name='blog_comment_post_page_idx'),
+            GinIndex(COMMENT_SEARCH_VECTOR, name='blog_comment_search_idx'),
         ]
 
     def __str__(self):
         return f'Comment by {self.name} on {self.post}'
- 
\ No newline at end of file
+ 
+
+class PostViewCount(models.Model):
+
+    '''
+    ViewCounting: One row per post and day with the number of times the post was read that day.
+    The rows are not written on every read. view_counter.py counts the reads in memory and adds them to these rows in batches, so the daily rows give both the read count of a post and its trend over time.
+    '''
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='view_counts')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            # The batched upsert relies on this constraint to add the new reads to an existing row (INSERT ... ON CONFLICT).
+            models.UniqueConstraint(fields=['post', 'date'], name='blog_post_view_count_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f'{self.views} views of {self.post} on {self.date}'
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.test import RequestFactory
+from django.utils.crypto import constant_time_compare
+
+# Prerendering: The static export and the cache warm-up render pages that nobody reads, so post_detail must not count them as reads.
+# A header alone could be sent by anyone to hide reads, so a page is only treated as prerendered if:
+# - it was rendered in-process by render_page(), which marks the request itself with request.blog_prerender, or
+# - it was requested over HTTP with the secret BLOG_PRERENDER_TOKEN in the X-Blog-Prerender header (the cache warm-up does this).
+PRERENDER_HEADER = 'X-Blog-Prerender'
+
+_handler = None
+
+
+def prerender_token():
+    return getattr(settings, 'BLOG_PRERENDER_TOKEN', '')
+
+
+def is_prerender(request):
+    if getattr(request, 'blog_prerender', False):
+        return True
+    token = prerender_token()
+    return bool(token) and constant_time_compare(request.headers.get(PRERENDER_HEADER, ''), token)
+
+
+def render_page(url, host):
+    '''
+    Renders a GET request for url through the middleware and the view, like the web server would, and returns the response.
+    Unlike the test Client, this does not touch the request signals, so it is safe to call from any thread or process.
+    '''
+    global _handler
+    if _handler is None:
+        handler = BaseHandler()
+        handler.load_middleware()
+        _handler = handler
+    request = RequestFactory(HTTP_HOST=host).get(url)
+    request.blog_prerender = True
+    return _handler.get_response(request)
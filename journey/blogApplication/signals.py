@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_sidebar
+from .comments import invalidate_comments
+from .models import Comment, Post
+from .warmup import schedule_post_warmup
+
+# Signals: Django sends the post_save and post_delete signals after a model instance is saved or deleted. The receivers below are connected in BlogapplicationConfig.ready().
+# Note that QuerySet.update() and bulk operations do not send these signals.
+
+
+# CommentPagination: A new comment, a moderated comment (active switched in the admin) or a deleted comment changes the first page and the count, so the cached copy is dropped.
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_comments(instance.post_id)
+
+
+# CacheWarming: When a post is saved, the sidebar (post count, latest posts) may change. If the post is published, its pages are rendered again in the background so that the first readers find warm caches.
+# transaction.on_commit() waits until the post is committed. Otherwise a reader could cache the data from before the save.
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    def refresh():
+        invalidate_sidebar()
+        if instance.status == Post.Status.PUBLISHED and getattr(settings, 'BLOG_WARMUP_ON_PUBLISH', True):
+            schedule_post_warmup(instance)
+    transaction.on_commit(refresh)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_sidebar)
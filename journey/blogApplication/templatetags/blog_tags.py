@@ -1,9 +1,14 @@
 from django import template
 from ..models import Post
-from django.db.models import Count
+from django.db.models import Count, Sum
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 
 from django.utils.safestring import mark_safe
-import markdown
+
+# Caching: The sidebar values and the Markdown HTML are cached. See caching.py.
+from ..caching import get_sidebar_value, render_markdown
 
 
 # The template tag is a Python function that is called by the Django template engine to render the output of the template.
@@ -20,7 +25,7 @@ register = template.Library()
 
 @register.simple_tag
 def total_posts():
- return Post.published.count()
+ return get_sidebar_value('total_posts', Post.published.count)
 
 # This code defines a custom template tag named show_latest_posts. The show_latest_posts template tag returns the latest published posts.
 # Simple tag and inclusion tag differ in the way they return the output. The simple tag returns a string, while the inclusion tag returns a dictionary of values.
@@ -29,19 +34,36 @@ def total_posts():
 @register.inclusion_tag('blogApplication/post/latest_posts.html')
 # Count allows you to specify how many posts you want to display. By default, it will display the latest 5 posts. 
 def show_latest_posts(count=5):
-    latest_posts = Post.published.order_by('-publish')[:count]
+    latest_posts = get_sidebar_value(f'latest_posts:{count}',
+                                     lambda: list(Post.published.only('title', 'slug', 'publish')
+                                                  .order_by('-publish')[:count]))
     return {'latest_posts': latest_posts}
 
 
 
 # The annotate() method allows you to add extra data to each object in a queryset. This additional data is not part of the model's fields but is dynamically calculated based on the existing data in the queryset.
+# The sidebar only needs the title and the URL of each post, so only() keeps the bodies of the posts out of the query and out of the cache.
 # The Count aggregation function is used to calculate the total number of comments for each post. The result of the Count aggregation is stored in a new field called total_comments.
 # After the annotate() method is applied, each Post object in the queryset will have an additional attribute called total_comments, which represents the total number of comments associated with that post.
 @register.simple_tag
 def get_most_commented_posts(count=5):
-    return Post.published.annotate(
-               total_comments=Count('comments')
-           ).order_by('-total_comments')[:count]
+    return get_sidebar_value(f'most_commented_posts:{count}', lambda: list(
+        Post.published.only('title', 'slug', 'publish').annotate(
+            total_comments=Count('comments')
+        ).order_by('-total_comments')[:count]))
+
+
+# ViewCounting: get_most_read_posts returns the posts with the most reads over the last BLOG_MOST_READ_DAYS days, summed from the daily PostViewCount rows.
+# Like the other sidebar values, the list is cached, so the aggregation runs at most once per cache timeout.
+@register.simple_tag
+def get_most_read_posts(count=5):
+    since = timezone.localdate() - timedelta(days=getattr(settings, 'BLOG_MOST_READ_DAYS', 7))
+    return get_sidebar_value(f'most_read_posts:{count}', lambda: list(
+        Post.published.only('title', 'slug', 'publish').filter(
+            view_counts__date__gte=since
+        ).annotate(
+            total_views=Sum('view_counts__views')
+        ).order_by('-total_views')[:count]))
 
 
 # The @register.filter(name='markdown') decorator registers a custom template filter named markdown. This filter will be used in Django templates to convert Markdown-formatted text to HTML
@@ -51,6 +73,6 @@ def get_most_commented_posts(count=5):
 
 @register.filter(name='markdown')
 def markdown_format(text):
-    return mark_safe(markdown.markdown(text))
+    return mark_safe(render_markdown(text))
 
 
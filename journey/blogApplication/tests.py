@@ -1,3 +1,700 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponseServerError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .models import Post, Comment, PostViewCount
+from .admin_scaling import CachedAuthorListFilter, EstimatedCountPaginator, estimated_count
+from .view_counter import ViewCounter
+from .ingest import ingest_posts
+from . import warmup
+from .caching import get_sidebar_value, invalidate_sidebar, render_markdown
+from .prerender import render_page
+from .management.commands.export_static import MANIFEST_NAME, output_path, paginated_urls
+from .comments import get_comment_page, get_first_comment_page
+from journey.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+
+# PerformanceTests: Every blog endpoint has a fixed budget of SQL queries and a wall-clock ceiling. A template or view change that adds queries (for example an N+1 query such as post.tags.all in list.html) makes the test fail and prints the SQL that ran.
+# Run them against a local PostgreSQL with 'python manage.py test blogApplication'. The caches are cleared before each request, so the budgets are those of a cold page.
+QUERY_BUDGETS = {
+    'post_list': 7,         # count, page of posts with authors, tags of the page, 4 sidebar queries
+    'post_list_by_tag': 8,  # tag, count, page of posts with authors, tags of the page, 4 sidebar queries
+    'post_detail': 8,       # post with author, first page of comments, comment count, similar posts, 4 sidebar queries
+    'post_search': 6,       # result count, results, 4 sidebar queries
+    'post_comment': 6,      # post, comment insert, 4 sidebar queries
+    'post_feed': 2,         # site, latest posts
+    'sitemap': 3,           # site, count, posts
+}
+
+# Wall-clock ceilings in seconds. Set BLOG_PERF_TIME_FACTOR to scale them on slow machines, for example BLOG_PERF_TIME_FACTOR=3.
+TIME_CEILINGS = {
+    'post_list': 0.3,
+    'post_list_by_tag': 0.3,
+    'post_detail': 0.4,
+    'post_search': 0.5,
+    'post_comment': 0.3,
+    'post_feed': 0.3,
+    'sitemap': 0.5,
+}
+TIME_FACTOR = float(os.getenv('BLOG_PERF_TIME_FACTOR', '1'))
+
+# Each request is repeated and the fastest run is compared to the ceiling, which keeps the tests stable on a busy machine.
+RUNS = 3
+
+
+def format_query_report(name, budget, queries):
+    '''
+    Builds the failure message for a query budget. Queries that differ only in their parameters are grouped, so N+1 queries stand out, and the queries over the budget are marked with '+'.
+    '''
+    statements = [query['sql'] for query in queries]
+    fingerprints = Counter(re.sub(r"'[^']*'|\b\d+\b", '?', sql) for sql in statements)
+    lines = [f'{name} ran {len(statements)} queries, the budget is {budget} (+{len(statements) - budget}).']
+    repeated = [(fingerprint, total) for fingerprint, total in fingerprints.items() if total > 1]
+    if repeated:
+        lines.append('Repeated queries (likely N+1):')
+        lines += [f'  {total} x {fingerprint}' for fingerprint, total in repeated]
+    lines.append('Queries (+ marks the queries over the budget):')
+    for number, sql in enumerate(statements, 1):
+        marker = '+' if number > budget else ' '
+        lines.append(f'{marker} {number:3}. {sql}')
+    return '\n'.join(lines)
+
+
+def create_blog_dataset():
+    '''
+    Creates a medium synthetic dataset and returns its posts and tags: 200 published posts and 20 drafts by 5 authors, 30 tags with 3 tags per post, 5 comments per post and 300 comments on the first post.
+    bulk_create() inserts each model in a few queries, so the dataset is built quickly.
+    '''
+    authors = User.objects.bulk_create([User(username=f'author{number}') for number in range(5)])
+    tags = Tag.objects.bulk_create([Tag(name=f'tag {number}', slug=f'tag-{number}') for number in range(30)])
+
+    now = timezone.now()
+    posts = Post.objects.bulk_create([
+        Post(title=f'Post number {number}',
+             slug=f'post-number-{number}',
+             author=authors[number % len(authors)],
+             body=f'**Post {number}** has a body written in *Markdown*.\n\n' + 'Lorem ipsum dolor sit amet. ' * 40,
+             publish=now - timedelta(days=number),
+             status=Post.Status.PUBLISHED if number < 200 else Post.Status.DRAFT)
+        for number in range(220)
+    ])
+
+    content_type = ContentType.objects.get_for_model(Post)
+    TaggedItem.objects.bulk_create([
+        TaggedItem(content_type=content_type, object_id=post.id, tag=tags[(index + offset) % len(tags)])
+        for index, post in enumerate(posts)
+        for offset in (0, 7, 13)
+    ])
+
+    comments = [Comment(post=post, name=f'Reader {number}', email=f'reader{number}@example.com', body='Nice post!')
+                for post in posts[:200] for number in range(5)]
+    comments += [Comment(post=posts[0], name=f'Fan {number}', email=f'fan{number}@example.com', body='Great read.')
+                 for number in range(300)]
+    Comment.objects.bulk_create(comments)
+    return posts, tags
+
+
+# The reads of post_detail are not counted here. The view counter writes from a background thread, which does not see the test data.
+@skipUnless(connection.vendor == 'postgresql', 'The performance tests run against PostgreSQL.')
+@override_settings(BLOG_VIEW_COUNTING=False)
+class EndpointPerformanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        posts, tags = create_blog_dataset()
+        cls.popular_post = posts[0]
+        cls.tag = tags[0]
+
+    def setUp(self):
+        # The content type of Post is cached by Django the first time it is used. Loading it here keeps that query out of the budgets.
+        ContentType.objects.get_for_model(Post)
+
+    def assertWithinBudget(self, name, url, data=None, method='get'):
+        budget = QUERY_BUDGETS[name]
+        timings = []
+        for _ in range(RUNS):
+            cache.clear()
+            Site.objects.clear_cache()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = getattr(self.client, method)(url, data)
+                timings.append(time.perf_counter() - start)
+            self.assertEqual(response.status_code, 200)
+            if len(context) > budget:
+                self.fail(format_query_report(name, budget, context.captured_queries))
+
+        ceiling = TIME_CEILINGS[name] * TIME_FACTOR
+        fastest = min(timings)
+        self.assertLessEqual(fastest, ceiling,
+                             f'{name} took {fastest * 1000:.0f} ms, the ceiling is {ceiling * 1000:.0f} ms.')
+
+    def test_post_list(self):
+        self.assertWithinBudget('post_list', reverse('blogApplication:post_list'), {'page': 2})
+
+    def test_post_list_by_tag(self):
+        self.assertWithinBudget('post_list_by_tag',
+                                reverse('blogApplication:post_list_by_tag', args=[self.tag.slug]))
+
+    def test_post_detail(self):
+        self.assertWithinBudget('post_detail', self.popular_post.get_absolute_url())
+
+    def test_post_search(self):
+        self.assertWithinBudget('post_search', reverse('blogApplication:post_search'), {'query': 'Post number 1'})
+
+    def test_post_comment(self):
+        data = {'name': 'Reader', 'email': 'reader@example.com', 'body': 'Thanks for the post.'}
+        self.assertWithinBudget('post_comment',
+                                reverse('blogApplication:post_comment', args=[self.popular_post.id]),
+                                data, method='post')
+
+    def test_post_feed(self):
+        self.assertWithinBudget('post_feed', reverse('blogApplication:post_feed'))
+
+    def test_sitemap(self):
+        self.assertWithinBudget('sitemap', reverse('django.contrib.sitemaps.views.sitemap'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The admin scaling mode uses PostgreSQL features.')
+@override_settings(BLOG_ADMIN_SCALING=True)
+class AdminScalingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.author = User.objects.create(username='author')
+        # The two posts sit on both sides of a month boundary.
+        cls.march = Post.objects.create(title='Django search', slug='django-search', author=cls.author,
+                                        body='Full text search with PostgreSQL.', status=Post.Status.PUBLISHED,
+                                        publish=timezone.make_aware(datetime(2024, 3, 31, 23, 59)))
+        cls.april = Post.objects.create(title='Pagination', slug='pagination', author=cls.author,
+                                        body='Keyset cursors.', status=Post.Status.PUBLISHED,
+                                        publish=timezone.make_aware(datetime(2024, 4, 1)))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:blogApplication_post_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def result_ids(self, changelist):
+        return sorted(post.id for post in changelist.result_list)
+
+    @override_settings(BLOG_ADMIN_EXACT_COUNT_THRESHOLD=0)
+    def test_estimated_count_counts_tables_that_were_never_analyzed(self):
+        table = connection.ops.quote_name(Post._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+            if cursor.fetchone()[0] != -1:
+                self.skipTest('PostgreSQL 14 or later reports -1 for tables that were never analyzed.')
+        # Without the fallback, the estimate of -1 rows would be returned as the count.
+        self.assertEqual(estimated_count(Post.objects.all()), 2)
+
+    @override_settings(BLOG_ADMIN_EXACT_COUNT_THRESHOLD=0)
+    def test_estimated_count_of_a_filtered_queryset_only_explains_it(self):
+        with CaptureQueriesContext(connection) as context:
+            estimate = estimated_count(Post.objects.filter(title='Pagination'))
+        self.assertIsInstance(estimate, int)
+        self.assertEqual(len(context), 1)
+        self.assertTrue(context.captured_queries[0]['sql'].startswith('EXPLAIN'))
+
+    def test_changelist_uses_the_scaling_mode(self):
+        changelist = self.changelist()
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        self.assertFalse(changelist.show_full_result_count)
+        self.assertIsNone(changelist.date_hierarchy)
+        with override_settings(BLOG_ADMIN_SCALING=False):
+            changelist = self.changelist()
+            self.assertNotIsInstance(changelist.paginator, EstimatedCountPaginator)
+            self.assertEqual(changelist.date_hierarchy, 'publish')
+
+    def test_publish_month_filter_uses_a_half_open_range(self):
+        self.assertEqual(self.result_ids(self.changelist(publish_month='2024-03')), [self.march.id])
+        self.assertEqual(self.result_ids(self.changelist(publish_month='2024-04')), [self.april.id])
+
+    def test_invalid_publish_month_is_ignored(self):
+        self.assertEqual(self.result_ids(self.changelist(publish_month='2024-13')), [self.march.id, self.april.id])
+
+    def test_author_filter_only_lists_authors_with_posts(self):
+        author_filter = next(spec for spec in self.changelist().filter_specs
+                             if isinstance(spec, CachedAuthorListFilter))
+        self.assertEqual(author_filter.lookup_choices, [(self.author.id, 'author')])
+
+    def test_search_uses_the_indexed_vector_in_the_where_clause_only(self):
+        changelist = self.changelist(q='search')
+        self.assertEqual(self.result_ids(changelist), [self.march.id])
+        self.assertNotIn('admin_search', changelist.queryset.query.annotation_select)
+
+
+# The reads of the post pages opened by these tests are not counted. Otherwise they would stay in the global view counter and be written when the test process exits, after the test database is gone.
+@skipUnless(connection.vendor == 'postgresql', 'The blog views use PostgreSQL features.')
+@override_settings(BLOG_VIEW_COUNTING=False)
+class PublishedPostTestCase(TestCase):
+    '''
+    Base class for the tests that need a single published post, self.post by self.author. The cache is cleared before each test.
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(title='Published', slug='published', author=cls.author, body='Body',
+                                       status=Post.Status.PUBLISHED)
+
+    def setUp(self):
+        cache.clear()
+
+
+class CommentPaginationTests(PublishedPostTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Comment.objects.bulk_create([Comment(post=cls.post, name=f'Reader {number}', email='reader@example.com', body='Hi')
+                                     for number in range(5)])
+        # All the comments share the same created value, so only the id tells them apart.
+        Comment.objects.update(created=timezone.now())
+
+    def test_pages_through_comments_with_equal_created(self):
+        seen = []
+        cursor = None
+        while True:
+            page = get_comment_page(self.post, cursor, per_page=2)
+            self.assertEqual(page['offset'], len(seen))
+            seen += [comment.id for comment in page['comments']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        expected = list(Comment.objects.filter(post=self.post).order_by('id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_next_cursor(self):
+        self.assertIsNone(get_comment_page(self.post, per_page=5)['next_cursor'])
+        self.assertIsNotNone(get_comment_page(self.post, per_page=4)['next_cursor'])
+
+    def test_malformed_cursor_returns_404(self):
+        response = self.client.get(reverse('blogApplication:post_comments', args=[self.post.id]),
+                                   {'after': 'not-a-cursor!!'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_moderating_a_comment_invalidates_the_first_page(self):
+        self.assertEqual(get_first_comment_page(self.post)['total_comments'], 5)
+        comment = Comment.objects.filter(post=self.post).first()
+        comment.active = False
+        comment.save()
+        first_page = get_first_comment_page(self.post)
+        self.assertEqual(first_page['total_comments'], 4)
+        self.assertNotIn(comment.id, [c.id for c in first_page['comments']])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The blog views use PostgreSQL features.')
+@override_settings(BLOG_VIEW_COUNTING=False)
+class ExportStaticTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        posts, _ = create_blog_dataset()
+        # The third newest post is in the feed as well.
+        cls.post = posts[2]
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_dir = directory.name
+
+    def export(self, fail=(), **options):
+        '''
+        Runs export_static in this process and returns the URLs it rendered. The URLs in fail return HTTP 500.
+        '''
+        rendered = []
+
+        def render(url, host):
+            rendered.append(url)
+            return HttpResponseServerError() if url in fail else render_page(url, host)
+
+        with patch('blogApplication.management.commands.export_static.render_page', render):
+            call_command('export_static', self.output_dir, workers=1, stdout=StringIO(), stderr=StringIO(), **options)
+        return rendered
+
+    def read(self, url, content_type='text/html'):
+        with open(os.path.join(self.output_dir, output_path(url, content_type)), encoding='utf-8') as page:
+            return page.read()
+
+    def modification_times(self):
+        return {os.path.join(root, name): os.stat(os.path.join(root, name)).st_mtime_ns
+                for root, _, names in os.walk(self.output_dir) for name in names if name != MANIFEST_NAME}
+
+    def edit_post(self, **fields):
+        for name, value in fields.items():
+            setattr(self.post, name, value)
+        self.post.save()
+
+    def test_unchanged_files_are_not_rewritten(self):
+        self.export()
+        before = self.modification_times()
+        self.assertEqual(self.export(), [])
+        # A full export renders every page again, but only writes the files whose content changed.
+        self.assertTrue(self.export(full=True))
+        self.assertEqual(self.modification_times(), before)
+
+    def test_changed_post_rebuilds_only_the_pages_that_show_it(self):
+        self.export()
+        self.edit_post(title='Edited title')
+        expected = {self.post.get_absolute_url(), reverse('blogApplication:post_feed'),
+                    reverse('django.contrib.sitemaps.views.sitemap')}
+        expected.update(paginated_urls(reverse('blogApplication:post_list'), Post.published.count()))
+        for slug in self.post.tags.values_list('slug', flat=True):
+            expected.update(paginated_urls(reverse('blogApplication:post_list_by_tag', args=[slug]),
+                                           Post.published.filter(tags__slug=slug).count()))
+        self.assertEqual(set(self.export()), expected)
+        self.assertIn('Edited title', self.read(self.post.get_absolute_url()))
+
+    def test_unpublished_post_file_is_removed(self):
+        self.export()
+        url = self.post.get_absolute_url()
+        self.read(url)
+        self.edit_post(status=Post.Status.DRAFT)
+        self.export()
+        with self.assertRaises(FileNotFoundError):
+            self.read(url)
+
+    def test_failed_post_page_is_kept_and_retried(self):
+        self.export()
+        url = self.post.get_absolute_url()
+        self.edit_post(title='Edited title')
+        self.export(fail={url})
+        self.assertNotIn('Edited title', self.read(url))
+        self.assertIn(url, self.export())
+        self.assertIn('Edited title', self.read(url))
+
+    def test_failed_shared_page_is_kept_and_retried(self):
+        self.export()
+        feed = reverse('blogApplication:post_feed')
+        self.edit_post(title='Edited title')
+        self.export(fail={feed})
+        self.assertNotIn('Edited title', self.read(feed, 'application/rss+xml'))
+        with open(os.path.join(self.output_dir, MANIFEST_NAME)) as manifest_file:
+            self.assertEqual(json.load(manifest_file)['retry'], ['feed'])
+        self.assertIn(feed, self.export())
+        self.assertIn('Edited title', self.read(feed, 'application/rss+xml'))
+
+
+class CacheWarmingTests(PublishedPostTestCase):
+
+    def saved_post_warmup_urls(self, post):
+        '''
+        Saves the post, runs the on_commit callbacks and returns the URLs the warm-up requested.
+        '''
+        with patch.object(warmup, '_executor', None), patch.object(warmup, 'WARMUP_DELAY', 0), \
+                patch('blogApplication.warmup.urlopen') as urlopen:
+            urlopen.return_value.__enter__.return_value.status = 200
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save()
+            if warmup._executor is not None:
+                warmup._executor.shutdown(wait=True)
+        return [call.args[0].full_url for call in urlopen.call_args_list]
+
+    @override_settings(BLOG_PRERENDER_TOKEN='secret')
+    def test_publishing_warms_the_pages_of_the_post(self):
+        self.post.tags.add('django')
+        expected = [warmup.WARMUP_BASE_URL.rstrip('/') + url for url in warmup.urls_for_post(self.post)]
+        self.assertIn(reverse('blogApplication:post_list_by_tag', args=['django']), expected[-1])
+        self.assertEqual(self.saved_post_warmup_urls(self.post), expected)
+
+    def test_post_page_is_not_warmed_without_the_prerender_token(self):
+        urls = self.saved_post_warmup_urls(self.post)
+        self.assertTrue(urls)
+        self.assertNotIn(warmup.WARMUP_BASE_URL.rstrip('/') + self.post.get_absolute_url(), urls)
+
+    def test_saving_a_draft_warms_nothing(self):
+        draft = Post(title='Draft', slug='draft', author=self.author, body='Body', status=Post.Status.DRAFT)
+        self.assertEqual(self.saved_post_warmup_urls(draft), [])
+
+    def test_invalidation_drops_every_sidebar_value(self):
+        self.assertEqual(get_sidebar_value('total_posts', lambda: 1), 1)
+        self.assertEqual(get_sidebar_value('total_posts', lambda: 2), 1)
+        invalidate_sidebar()
+        self.assertEqual(get_sidebar_value('total_posts', lambda: 2), 2)
+
+
+class ViewCounterTests(PublishedPostTestCase):
+
+    @override_settings(BLOG_VIEW_COUNTING=True)
+    def test_flush_adds_reads_to_the_daily_row(self):
+        counter = ViewCounter()
+        for _ in range(3):
+            counter._pending[(self.post.id, timezone.localdate())] += 1
+        self.assertEqual(counter.flush(), 3)
+        counter._pending[(self.post.id, timezone.localdate())] += 2
+        self.assertEqual(counter.flush(), 2)
+
+        row = PostViewCount.objects.get(post=self.post)
+        self.assertEqual(row.views, 5)
+        self.assertEqual(row.date, timezone.localdate())
+
+    @override_settings(BLOG_VIEW_COUNTING=True)
+    def test_flush_drops_reads_of_deleted_posts(self):
+        counter = ViewCounter()
+        counter._pending[(self.post.id + 1000, timezone.localdate())] += 1
+        self.assertEqual(counter.flush(), 0)
+        self.assertFalse(PostViewCount.objects.exists())
+
+    def test_flush_writes_nothing_when_counting_is_off(self):
+        counter = ViewCounter()
+        counter._pending[(self.post.id, timezone.localdate())] += 1
+        self.assertEqual(counter.flush(), 0)
+        self.assertFalse(counter._pending)
+        self.assertFalse(PostViewCount.objects.exists())
+
+    def test_prerender_header_needs_the_secret_token(self):
+        url = self.post.get_absolute_url()
+        with patch('blogApplication.views.record_post_view') as record:
+            self.client.get(url, headers={'X-Blog-Prerender': '1'})
+            self.assertEqual(record.call_count, 1)
+            with override_settings(BLOG_PRERENDER_TOKEN='secret'):
+                self.client.get(url, headers={'X-Blog-Prerender': 'guess'})
+                self.assertEqual(record.call_count, 2)
+                self.client.get(url, headers={'X-Blog-Prerender': 'secret'})
+                self.assertEqual(record.call_count, 2)
+
+    def test_render_page_is_not_counted(self):
+        with patch('blogApplication.views.record_post_view') as record:
+            response = render_page(self.post.get_absolute_url(), 'testserver')
+        self.assertEqual(response.status_code, 200)
+        record.assert_not_called()
+
+
+class AnonymousFastPathTests(PublishedPostTestCase):
+
+    def test_public_page_sets_no_cookie(self):
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertTrue(response.wsgi_request.blog_fast_path)
+        self.assertEqual(response.cookies, {})
+        self.assertContains(response, reverse('blogApplication:csrf_token'))
+
+    def test_share_page_keeps_session_and_csrf(self):
+        response = self.client.get(reverse('blogApplication:post_share', args=[self.post.id]))
+        self.assertFalse(response.wsgi_request.blog_fast_path)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_csrf_token_view_issues_cookie(self):
+        response = self.client.get(reverse('blogApplication:csrf_token'))
+        self.assertIn('csrftoken', response.cookies)
+        self.assertTrue(response.json()['token'])
+
+    def test_comment_form_works_without_javascript(self):
+        url = self.post.get_absolute_url()
+        self.assertContains(self.client.get(url), '<noscript>')
+        response = self.client.get(reverse('blogApplication:csrf_token'), {'next': f'{url}#comment-form'})
+        self.assertRedirects(response, f'{url}#comment-form', fetch_redirect_response=False)
+        # The CSRF cookie takes the page off the fast path, so the form is rendered with its token.
+        response = self.client.get(url)
+        self.assertFalse(response.wsgi_request.blog_fast_path)
+        self.assertRegex(response.content.decode(), r'name="csrfmiddlewaretoken" value="[^"]+"')
+
+    def test_csrf_token_view_ignores_external_next_urls(self):
+        response = self.client.get(reverse('blogApplication:csrf_token'), {'next': 'https://example.com/'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['token'])
+
+
+class FakeConnection:
+    # Stands in for a psycopg2 connection: closed, info.transaction_status, rollback() and close() are all the pool uses.
+
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=0)
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_timeout_when_every_connection_is_in_use(self):
+        pool = ConnectionPool(min_size=0, max_size=2, timeout=0.05)
+        pool.getconn(FakeConnection)
+        pool.getconn(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['in_use'], 2)
+        self.assertEqual(stats['saturation'], 1.0)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+
+    def test_most_recently_returned_connection_is_reused_first(self):
+        pool = ConnectionPool(min_size=0, max_size=3)
+        first = pool.getconn(FakeConnection)
+        second = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        pool.putconn(second)
+        self.assertIs(pool.getconn(FakeConnection), second)
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats()['size'], 2)
+
+    def test_idle_connections_are_recycled_down_to_min_size(self):
+        pool = ConnectionPool(min_size=2, max_size=5, max_idle=-1)
+        connections = [pool.getconn(FakeConnection) for _ in range(4)]
+        for conn in connections:
+            pool.putconn(conn)
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(stats['recycled'], 2)
+        self.assertEqual(sum(conn.closed for conn in connections), 2)
+
+    def test_failed_connect_releases_its_slot(self):
+        pool = ConnectionPool(min_size=0, max_size=1, timeout=0.05)
+
+        def connect():
+            raise OSError('Connection refused')
+
+        with self.assertRaises(OSError):
+            pool.getconn(connect)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertEqual(pool.stats()['in_use'], 0)
+        self.assertIsInstance(pool.getconn(FakeConnection), FakeConnection)
+
+    def test_connection_returned_inside_a_transaction_is_rolled_back(self):
+        pool = ConnectionPool(min_size=0, max_size=1)
+        conn = pool.getconn(FakeConnection)
+        conn.info.transaction_status = 2
+        pool.putconn(conn)
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertFalse(conn.closed)
+        self.assertIs(pool.getconn(FakeConnection), conn)
+
+    def test_close_closes_idle_connections_and_returned_ones(self):
+        pool = ConnectionPool(min_size=0, max_size=2)
+        idle = pool.getconn(FakeConnection)
+        in_use = pool.getconn(FakeConnection)
+        pool.putconn(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.putconn(in_use)
+        self.assertTrue(in_use.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_abandoned_pool_never_closes_its_connections(self):
+        pool = ConnectionPool(min_size=0, max_size=2)
+        idle = pool.getconn(FakeConnection)
+        in_use = pool.getconn(FakeConnection)
+        in_use.info.transaction_status = 2
+        pool.putconn(idle)
+        pool.abandon()
+        pool.putconn(in_use)
+        self.assertFalse(idle.closed)
+        self.assertFalse(in_use.closed)
+        self.assertEqual(in_use.rollbacks, 0)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The bulk ingestion relies on PostgreSQL returning the ids of bulk inserts.')
+@override_settings(BLOG_VIEW_COUNTING=False)
+class BulkIngestionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        Tag.objects.create(name='django', slug='django')
+
+    def test_ingest_creates_posts_tags_and_unique_slugs(self):
+        records = [
+            {'title': 'Same title', 'body': 'First', 'author': 'author', 'tags': ['django', 'python'],
+             'publish': '2024-03-24T10:00:00'},
+            {'title': 'Same title', 'body': 'Second', 'author': 'author', 'tags': ['python'],
+             'publish': '2024-03-24T12:00:00', 'status': 'draft'},
+        ]
+        self.assertEqual(ingest_posts(records), 2)
+
+        posts = list(Post.objects.order_by('id'))
+        self.assertEqual([post.slug for post in posts], ['same-title', 'same-title-2'])
+        self.assertEqual(posts[1].status, Post.Status.DRAFT)
+        self.assertEqual(sorted(posts[0].tags.names()), ['django', 'python'])
+        self.assertEqual(list(posts[1].tags.names()), ['python'])
+        self.assertEqual(Tag.objects.filter(name='python').count(), 1)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        ContentType.objects.get_for_model(Post)
+        small = [{'title': f'Small {number}', 'body': 'Body', 'author': 'author', 'tags': [f'small-{number}', 'django']}
+                 for number in range(2)]
+        large = [{'title': f'Large {number}', 'body': 'Body', 'author': 'author', 'tags': [f'large-{number}', 'django']}
+                 for number in range(20)]
+        with CaptureQueriesContext(connection) as small_queries:
+            ingest_posts(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            ingest_posts(large)
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(TaggedItem.objects.count(), 44)
+
+    def test_ingest_rejects_unknown_authors(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown authors: nobody'):
+            ingest_posts([{'title': 'Title', 'body': 'Body', 'author': 'nobody'}])
+        self.assertFalse(Post.objects.exists())
+
+    def test_ingest_renders_the_markdown_and_invalidates_the_sidebar(self):
+        cache.clear()
+        get_sidebar_value('total_posts', lambda: 0)
+        ingest_posts([{'title': 'Cached', 'body': '**Bold**', 'author': 'author'}])
+        with patch('blogApplication.caching.markdown.markdown') as convert:
+            self.assertEqual(render_markdown('**Bold**'), '<p><strong>Bold</strong></p>')
+        convert.assert_not_called()
+        self.assertEqual(get_sidebar_value('total_posts', lambda: 1), 1)
+
+    def test_title_without_slug_characters_gets_a_fallback_slug(self):
+        records = [{'title': '!!!', 'body': 'Body', 'author': 'author', 'publish': '2024-03-24T10:00:00'}] * 2
+        ingest_posts(records)
+        posts = list(Post.objects.order_by('id'))
+        self.assertEqual([post.slug for post in posts], ['post', 'post-2'])
+        self.assertEqual(self.client.get(posts[1].get_absolute_url()).status_code, 200)
+
+    def test_ingest_rejects_invalid_records(self):
+        invalid = [
+            ['not', 'an', 'object'],
+            {'body': 'Body', 'author': 'author'},
+            {'title': 'Title', 'body': 'Body', 'author': 'author', 'status': 1},
+            {'title': 'Title', 'body': 'Body', 'author': 'author', 'publish': 'yesterday'},
+            {'title': 'Title', 'body': 'Body', 'author': 'author', 'tags': 'django'},
+        ]
+        for record in invalid:
+            with self.subTest(record=record), self.assertRaises(ValueError):
+                ingest_posts([record])
+        self.assertFalse(Post.objects.exists())
+
+    def test_command_names_the_invalid_line(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'posts.jsonl')
+        with open(path, 'w') as posts_file:
+            posts_file.write('{"title": "Valid", "body": "Body", "author": "author"}\n')
+            posts_file.write('{"title": "Missing body", "author": "author"}\n')
+        with self.assertRaisesMessage(CommandError, 'Line 2: body is required'):
+            call_command('ingest_posts', path, stdout=StringIO())
@@ -14,6 +14,8 @@ urlpatterns = [
     path('<int:year>/<int:month>/<int:day>/<slug:post>/', views.post_detail, name='post_detail'),
     path('<int:post_id>/share/', views.post_share, name='post_share'),
     path('<int:post_id>/comment/', views.post_comment, name='post_comment'),
+    path('<int:post_id>/comments/', views.post_comments, name='post_comments'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
     path('feed/', LatestPostsFeed(), name='post_feed'),
     path('search/', views.post_search, name='post_search'),
 ]
\ No newline at end of file
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .models import Post, PostViewCount
+
+logger = logging.getLogger(__name__)
+
+# ViewCounting: Reads of post_detail are counted in memory, per process, and written to PostViewCount in one batched upsert every FLUSH_INTERVAL seconds.
+# An UPDATE on every read would lock the row of the post on every hit of our most popular pages.
+#
+# Lost increments: the reads that are still in memory are lost if the process is killed without running its exit handlers (for example with SIGKILL or by the out-of-memory killer).
+# That is at most FLUSH_INTERVAL seconds of reads per process. A graceful shutdown flushes the pending reads, and a failed flush keeps them in memory for the next attempt.
+FLUSH_INTERVAL = getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 30)
+
+# A flush is started early when this many distinct (post, day) pairs are pending, which bounds the memory used by the buffer.
+MAX_PENDING = getattr(settings, 'BLOG_VIEW_MAX_PENDING', 1000)
+
+# Number of rows written by each INSERT statement of a flush.
+BATCH_SIZE = 500
+
+
+class ViewCounter:
+    '''
+    The ViewCounter class buffers post reads and writes them to the database from a background thread.
+    record() only takes a lock and increments a Counter, so it adds no query to the request.
+    '''
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._thread = None
+
+    def record(self, post_id):
+        key = (post_id, timezone.localdate())
+        with self._lock:
+            self._pending[key] += 1
+            full = len(self._pending) >= self.max_pending
+            # The thread is started on the first read and again after a fork, because threads do not survive in the child process.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake_up.set()
+
+    def flush(self):
+        '''
+        Adds the pending reads to the PostViewCount rows and returns the number of reads written.
+        With BLOG_VIEW_COUNTING off, the pending reads are dropped instead.
+        '''
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending or not getattr(settings, 'BLOG_VIEW_COUNTING', True):
+            return 0
+
+        rows = []
+        try:
+            # Reads of posts deleted since they were counted are dropped. Their rows would violate the foreign key.
+            post_ids = {post_id for post_id, _ in pending}
+            existing = set(Post.objects.filter(id__in=post_ids).values_list('id', flat=True))
+            rows = [(post_id, date, views) for (post_id, date), views in pending.items() if post_id in existing]
+            with transaction.atomic():
+                for start in range(0, len(rows), BATCH_SIZE):
+                    self._upsert(rows[start:start + BATCH_SIZE])
+        except DatabaseError:
+            logger.exception('Could not write %d post view counts, keeping them for the next flush', len(pending))
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return sum(views for _, _, views in rows)
+
+    def _upsert(self, rows):
+        # The ORM cannot add to the existing value on conflict (bulk_create(update_conflicts=True) replaces it), so this statement is written in SQL.
+        connection = connections[PostViewCount.objects.db]
+        table = connection.ops.quote_name(PostViewCount._meta.db_table)
+        values = ', '.join(['(%s, %s, %s)'] * len(rows))
+        params = [value for row in rows for value in row]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (post_id, date, views) VALUES {values} '
+                f'ON CONFLICT (post_id, date) DO UPDATE SET views = {table}.views + EXCLUDED.views',
+                params)
+
+    def _run(self):
+        while True:
+            self._wake_up.wait(self.flush_interval)
+            self._wake_up.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Post view counter flush failed')
+            finally:
+                # The background thread has its own database connection. It is closed between flushes instead of being held open while idle.
+                connections.close_all()
+
+
+view_counter = ViewCounter()
+
+# Pending reads are written when the process exits normally.
+atexit.register(view_counter.flush)
+
+
+def record_post_view(post_id):
+    if getattr(settings, 'BLOG_VIEW_COUNTING', True):
+        view_counter.record(post_id)
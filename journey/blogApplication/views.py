@@ -1,4 +1,8 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import redirect, render, get_object_or_404
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.cache import never_cache
 from .models import Post, Comment
 from django.views.generic import ListView
 from .forms import EmailPostForm, CommentForm, SearchForm
@@ -25,6 +29,16 @@ from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
 # The TrigramSimilarity function is used to calculate the similarity between two strings based on trigram similarity.
 from django.contrib.postgres.search import TrigramSimilarity
 
+# CommentPagination: Comments are loaded one page at a time using a keyset cursor. See comments.py.
+from .comments import get_comment_page, get_first_comment_page
+
+# ViewCounting: Reads are counted in memory and written to the database in batches. See view_counter.py.
+from .view_counter import record_post_view
+from .prerender import is_prerender
+
+# Pagination: Number of posts on each page of post_list. The static export command uses it too, to know how many list pages to render.
+POSTS_PER_PAGE = 3
+
 # Class based view to display a list of posts
 class PostListView(ListView):
 
@@ -39,7 +53,7 @@ class PostListView(ListView):
     
     queryset = Post.published.all()
     context_object_name = 'posts'
-    paginate_by = 3
+    paginate_by = POSTS_PER_PAGE
     template_name = 'blogApplication/post/list.html'
 
 
@@ -49,7 +63,8 @@ def post_list(request, tag_slug=None):
     # The Paginator class takes two arguments: the list of objects to paginate and the number of objects to include on each page.
     # We will include three posts on each page.
 
-    post_list = Post.published.all()
+    # select_related() fetches the author of each post in the same query, and prefetch_related() fetches the tags of all the posts of the page in one extra query. Without them, the template would run two queries per post.
+    post_list = Post.published.select_related('author').prefetch_related('tags')
     
     # The tag variable is used to store the Tag object that matches the given tag_slug. If the tag_slug parameter is not provided, the tag variable will be set to None.
     tag = None
@@ -61,7 +76,7 @@ def post_list(request, tag_slug=None):
         post_list = post_list.filter(tags__in=[tag])
 
     # Pagination: with 3 posts per page
-    paginator = Paginator(post_list, 3)
+    paginator = Paginator(post_list, POSTS_PER_PAGE)
     page_number = request.GET.get('page', 1)
     try:
         posts = paginator.page(page_number)
@@ -75,12 +90,15 @@ def post_list(request, tag_slug=None):
 
 # The post variable is passed to the slug parameter as a way to filter the Post objects by their slug field. It will return name of the post to the slug parameter.
 def post_detail(request, year, month, day, post):
-    post = get_object_or_404(Post, slug=post, status=Post.Status.PUBLISHED,
+    post = get_object_or_404(Post.objects.select_related('author'), slug=post, status=Post.Status.PUBLISHED,
                              publish__year=year,
                              publish__month=month,
                              publish__day=day)
-    # List of active comments for this post
-    comments = post.comments.filter(active=True)
+    # Pages rendered by the cache warm-up and the static export are not reads, so they are not counted. See prerender.py.
+    if not is_prerender(request):
+        record_post_view(post.id)
+    # First page of active comments for this post, together with the total number of active comments. Both come from the cache when possible.
+    comment_page = get_first_comment_page(post)
     # Form for users to comment
     form = CommentForm()
     
@@ -99,7 +117,17 @@ def post_detail(request, year, month, day, post):
   
     similar_posts = similar_posts.annotate(same_tags=Count('tags'))\
                                     .order_by('-same_tags','-publish')[:4]
-    return render(request, 'blogApplication/post/detail.html', {'post': post, 'comments': comments,'form': form, 'similar_posts': similar_posts})
+    return render(request, 'blogApplication/post/detail.html', {'post': post, 'form': form, 'similar_posts': similar_posts, **comment_page})
+
+
+# CommentPagination: The post_comments view returns the HTML fragment with the page of comments that follows the cursor given in the 'after' query parameter.
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id, status=Post.Status.PUBLISHED)
+    try:
+        comment_page = get_comment_page(post, request.GET.get('after'))
+    except ValueError:
+        raise Http404('Invalid comment cursor.')
+    return render(request, 'blogApplication/post/includes/comments.html', {'post': post, **comment_page})
 
 
 
@@ -137,6 +165,19 @@ def post_share(request, post_id):
     return render(request, 'blogApplication/post/share.html', {'post': post, 'form': form, 'sent': sent})
 
 
+# FastPath: Public pages served on the fast path contain no CSRF token. The comment form fetches one from this view when the reader starts writing a comment.
+# get_token() also sets the CSRF cookie on the response, and never_cache stops caches from sharing one reader's token with others.
+# Without JavaScript, the form links here with a 'next' parameter. The reader is sent back to the page with the CSRF cookie, which takes the page off the fast path, so the form gets its token.
+@never_cache
+def csrf_token(request):
+    token = get_token(request)
+    next_url = request.GET.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()},
+                                                    require_https=request.is_secure()):
+        return redirect(next_url)
+    return JsonResponse({'token': token})
+
+
 # Django will throw a Http 405 if some other method is used to access the view
 @require_POST
 def post_comment(request,post_id):
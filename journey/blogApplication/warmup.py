@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.urls import Resolver404, resolve, reverse
+
+from .prerender import PRERENDER_HEADER, prerender_token
+
+logger = logging.getLogger(__name__)
+
+# CacheWarming: The warm-up requests the pages over HTTP from the running site, like a reader would. This fills the Markdown, sidebar and comment caches (and the database buffers) of the web server before real readers arrive.
+# The caches are only warm for every reader if the web server processes share them (see CACHES in settings.py). With a per-process cache, only the process that answered a warm-up request is warm.
+# WARMUP_CONCURRENCY is the number of pages requested at the same time and WARMUP_DELAY the pause in seconds after each page. Keep both small so the warm-up never starves live traffic of CPU or database connections.
+WARMUP_CONCURRENCY = getattr(settings, 'BLOG_WARMUP_CONCURRENCY', 2)
+WARMUP_DELAY = getattr(settings, 'BLOG_WARMUP_DELAY', 0.05)
+WARMUP_BASE_URL = getattr(settings, 'BLOG_WARMUP_BASE_URL', 'http://localhost:8000')
+WARMUP_TIMEOUT = getattr(settings, 'BLOG_WARMUP_TIMEOUT', 10)
+
+# The executor used by warm-ups started from signals. It is shared by the whole process, so several posts published at once still never use more than WARMUP_CONCURRENCY threads.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def warm_url(url, base_url=WARMUP_BASE_URL, delay=WARMUP_DELAY):
+    '''
+    Requests a single URL from the site at base_url and returns its HTTP status code.
+    Raises OSError if the site cannot be reached.
+    '''
+    headers = {'User-Agent': 'journey-warmup'}
+    if prerender_token():
+        # With the token, post_detail does not count the warm-up request as a read.
+        headers[PRERENDER_HEADER] = prerender_token()
+    request = Request(base_url.rstrip('/') + url, headers=headers)
+    try:
+        with urlopen(request, timeout=WARMUP_TIMEOUT) as response:
+            # The body is read so the server renders and sends the whole page.
+            response.read()
+            return response.status
+    except HTTPError as e:
+        return e.code
+    finally:
+        time.sleep(delay)
+
+
+def warmable_urls(urls):
+    '''
+    Returns the URLs that the warm-up may request.
+    post_detail counts every request as a read, so without BLOG_PRERENDER_TOKEN its pages are left out. Otherwise each publish and each warm_cache run would count as reads and skew the "Most read posts" sidebar.
+    '''
+    if prerender_token():
+        return list(urls)
+    return [url for url in urls if not _counts_reads(url)]
+
+
+def _counts_reads(url):
+    try:
+        return resolve(url.partition('?')[0]).view_name == 'blogApplication:post_detail'
+    except Resolver404:
+        return False
+
+
+def _warm_url_or_log(url, base_url, delay):
+    try:
+        return warm_url(url, base_url, delay)
+    except OSError:
+        logger.exception('Cache warm-up of %s failed', url)
+        return None
+
+
+def warm_urls(urls, concurrency=WARMUP_CONCURRENCY, base_url=WARMUP_BASE_URL, delay=WARMUP_DELAY):
+    '''
+    Requests the given URLs with at most `concurrency` requests at the same time and waits until all are done.
+    Returns a dictionary that maps each URL to its HTTP status code, or to None if the site could not be reached. The URLs left out by warmable_urls() are not in it.
+    '''
+    urls = warmable_urls(urls)
+    # The worker threads only wait for HTTP responses. They never touch the database, so they need no connection handling.
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='warmup') as executor:
+        statuses = executor.map(lambda url: _warm_url_or_log(url, base_url, delay), urls)
+        return dict(zip(urls, statuses))
+
+
+def urls_for_post(post):
+    '''
+    Returns the URLs whose content depends on the given post: its detail page, the first page of post_list and of its tag pages, the feed and the sitemap.
+    '''
+    urls = [
+        post.get_absolute_url(),
+        reverse('blogApplication:post_list'),
+        reverse('blogApplication:post_feed'),
+        reverse('django.contrib.sitemaps.views.sitemap'),
+    ]
+    urls += [reverse('blogApplication:post_list_by_tag', args=[slug])
+             for slug in post.tags.values_list('slug', flat=True)]
+    return urls
+
+
+def _warm_in_background(urls):
+    for url in urls:
+        status = _warm_url_or_log(url, WARMUP_BASE_URL, WARMUP_DELAY)
+        if status is not None and status != 200:
+            logger.warning('Cache warm-up of %s returned HTTP %s', url, status)
+
+
+def schedule_post_warmup(post):
+    '''
+    Warms the pages of a post in the background, without making the request that saved the post wait.
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WARMUP_CONCURRENCY, thread_name_prefix='warmup')
+    # The URLs are collected now, in the thread that saved the post, and requested one after the other by a worker thread.
+    _executor.submit(_warm_in_background, warmable_urls(urls_for_post(post)))
@@ -0,0 +1,94 @@
+import os
+import threading
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from .creation import DatabaseCreation
+from .pool import ConnectionPool, PoolTimeout
+
+# ConnectionPool: This database backend is the PostgreSQL backend of Django with a connection pool.
+# Django closes its connection at the end of every request (CONN_MAX_AGE = 0). With this backend, closing returns the connection to the pool, so the next request skips the TCP, TLS and authentication handshake.
+# Each thread still has its own Django connection object, so threads (including the ones ASGI uses to run sync code) never share a connection. They only share the pool, which is thread-safe.
+# The pool is configured with the POOL dictionary of the database settings. Without POOL, the backend behaves like django.db.backends.postgresql.
+# close() only returns the connection to the pool. close_pool() really closes the idle connections, for when the database must have no open sessions (dropping the test database) or before forking.
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools inherited from the parent of a forked process. See _after_fork_in_child().
+_abandoned_pools = []
+
+
+def get_pools():
+    with _pools_lock:
+        return dict(_pools)
+
+
+def _after_fork_in_child():
+    # A forked worker process must not use the sockets of its parent, so it starts with new pools.
+    # The inherited pools are kept referenced and abandoned: closing their connections, even through the garbage collector, would end the parent's sessions.
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    for pool in _pools.values():
+        pool.abandon()
+        _abandoned_pools.append(pool)
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    # The pool the current connection was taken from, so it goes back to the same pool even if the settings changed in the meantime.
+    _pool = None
+
+    def pool_key(self):
+        # The pool is keyed by the connection settings as well as the alias. The test runner switches NAME to the test database, and must not get connections to the original one.
+        return (self.alias, self.settings_dict['NAME'], self.settings_dict['HOST'],
+                self.settings_dict['PORT'], self.settings_dict['USER'])
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        # The connections Django opens to the 'postgres' database, for example to create the test database, are short-lived and are not pooled.
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        key = self.pool_key()
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(**{name.lower(): value for name, value in options.items()})
+        return pool
+
+    def close_pool(self):
+        '''
+        Closes the connection and every idle connection of the pool for the current settings. The next connection starts a new pool.
+        '''
+        self.close()
+        with _pools_lock:
+            pool = _pools.pop(self.pool_key(), None)
+        if pool is not None:
+            pool.close()
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            # Raising the driver's OperationalError lets Django turn it into django.db.OperationalError, like any other connection failure.
+            raise self.Database.OperationalError(str(e)) from e
+        self._pool = pool
+        return connection
+
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    '''
+    A thread-safe pool of PostgreSQL connections.
+
+    Connections are opened on demand, up to max_size. When every connection is in use, getconn() waits up to timeout seconds for one to be returned.
+    A connection that was idle for more than check_after seconds is checked with SELECT 1 before it is handed out, and a connection older than max_lifetime is replaced.
+    Connections idle for more than max_idle seconds are closed, but the pool never closes connections below min_size.
+    close() closes the idle connections, and the connections still in use are closed when they are returned.
+    '''
+
+    def __init__(self, min_size=2, max_size=10, timeout=5, max_idle=300, max_lifetime=3600, check_after=30):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+
+        self._condition = threading.Condition()
+        # Idle connections as (connection, created_at, last_used_at) tuples. The most recently used connection is at the right end.
+        self._idle = deque()
+        # Number of open connections, idle or in use, plus the connections being opened.
+        self._size = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._failed_health_checks = 0
+        self._recycled = 0
+        self._peak_in_use = 0
+        self._created_at = {}
+
+        self._closed = False
+        # An abandoned pool belongs to the parent of a forked process. Its connections are never closed, only kept in _orphans. See abandon().
+        self._abandoned = False
+        self._orphans = []
+
+    def getconn(self, connect):
+        '''
+        Returns a connection from the pool. connect() is called to open a new connection when there is no idle one and the pool is not full.
+        Raises PoolTimeout if no connection becomes available within the timeout.
+        '''
+        started = time.monotonic()
+        deadline = started + self.timeout
+        entry = None
+        with self._condition:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolTimeout('The connection pool is closed.')
+                if self._idle:
+                    # The most recently used connection is taken first (LIFO). The others stay idle long enough to be closed when traffic drops.
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f'No database connection available after {self.timeout} seconds '
+                                      f'({self.max_size} connections in use).')
+                self._condition.wait(remaining)
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += time.monotonic() - started
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        # Opening and checking connections happens outside the lock, so a slow network does not block the other threads.
+        try:
+            if entry is not None:
+                connection, created_at, last_used_at = entry
+                if self._is_healthy(connection, created_at, last_used_at):
+                    return connection
+                self._close(connection)
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def putconn(self, connection):
+        '''
+        Returns a connection to the pool. A connection that is broken or still inside a transaction is rolled back or closed, so the next user always gets a clean one.
+        '''
+        if self._abandoned:
+            # Even a rollback would be sent over the socket shared with the parent process.
+            self._orphans.append(connection)
+            return
+        reusable = not connection.closed
+        if reusable and connection.info.transaction_status != 0:
+            # 0 is the IDLE transaction status in both psycopg2 and psycopg 3.
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+
+        now = time.monotonic()
+        created_at = self._created_at.get(id(connection), now)
+        expired = now - created_at > self.max_lifetime
+
+        to_close = []
+        with self._condition:
+            self._in_use -= 1
+            if expired:
+                reusable = False
+                self._recycled += 1
+            if reusable and not self._closed:
+                self._idle.append((connection, created_at, now))
+            else:
+                self._size -= 1
+                to_close.append(connection)
+            # Idle recycling: the connections at the left end were unused for the longest time.
+            while (self._idle and self._size > self.min_size
+                   and now - self._idle[0][2] > self.max_idle):
+                to_close.append(self._idle.popleft()[0])
+                self._size -= 1
+                self._recycled += 1
+            self._condition.notify()
+
+        for connection in to_close:
+            self._close(connection)
+
+    def close(self):
+        '''
+        Closes the idle connections. The connections in use are closed when they are returned, and later getconn() calls fail.
+        '''
+        with self._condition:
+            self._closed = True
+            to_close = [entry[0] for entry in self._idle]
+            self._size -= len(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for connection in to_close:
+            self._close(connection)
+
+    def abandon(self):
+        '''
+        Marks the pool as inherited from the parent of a forked process.
+        The connections share their sockets with the parent, so closing them (or letting the garbage collector do it) would end the parent's sessions. They are kept referenced instead.
+        '''
+        # The lock may have been held by a thread that does not exist in the child, so it is replaced rather than acquired.
+        self._condition = threading.Condition()
+        self._abandoned = True
+        self._closed = True
+        self._orphans.extend(entry[0] for entry in self._idle)
+        self._idle.clear()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                # Saturation is the share of the maximum pool size currently in use. At 1.0, new requests have to wait.
+                'saturation': self._in_use / self.max_size,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_time, 6),
+                'timeouts': self._timeouts,
+                'failed_health_checks': self._failed_health_checks,
+                'recycled': self._recycled,
+            }
+
+    def _is_healthy(self, connection, created_at, last_used_at):
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            with self._condition:
+                self._recycled += 1
+            return False
+        healthy = not connection.closed
+        if healthy and now - last_used_at > self.check_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                # Outside autocommit mode, the check itself opened a transaction.
+                if connection.info.transaction_status != 0:
+                    connection.rollback()
+            except Exception:
+                healthy = False
+        if not healthy:
+            with self._condition:
+                self._failed_health_checks += 1
+        return healthy
+
+    def _close(self, connection):
+        self._created_at.pop(id(connection), None)
+        if self._abandoned:
+            self._orphans.append(connection)
+            return
+        try:
+            connection.close()
+        except Exception:
+            pass
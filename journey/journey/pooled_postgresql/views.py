@@ -0,0 +1,13 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .base import get_pools
+
+
+# ConnectionPool: Returns the statistics of the connection pools of the process that serves the request. Each worker process has its own pools.
+@staff_member_required
+def pool_stats(request):
+    return JsonResponse({
+        ':'.join(str(part) for part in key[:2]): pool.stats()
+        for key, pool in get_pools().items()
+    })
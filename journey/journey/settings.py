@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,16 +53,32 @@ INSTALLED_APPS = [
     'django.contrib.postgres',
 ]
 
+# FastPath: The session, authentication and message middleware are subclasses of the Django ones that skip their work for anonymous GET requests to the views in BLOG_FAST_PATH_VIEWS.
+# With BLOG_ANONYMOUS_FAST_PATH = False they behave exactly like the Django middleware.
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'blogApplication.middleware.AnonymousFastPathMiddleware',
+    'blogApplication.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'blogApplication.middleware.AuthenticationMiddleware',
+    'blogApplication.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+BLOG_ANONYMOUS_FAST_PATH = True
+# The comment form of post_detail loads its CSRF token on demand, so CSRF cookies are only issued to readers who start writing a comment.
+# post_share is not listed: its page is only opened by readers who want to share a post, and it keeps its CSRF token.
+BLOG_FAST_PATH_VIEWS = [
+    'blogApplication:post_list',
+    'blogApplication:post_list_by_tag',
+    'blogApplication:post_detail',
+    'blogApplication:post_comments',
+    'blogApplication:post_search',
+    'blogApplication:post_feed',
+    'django.contrib.sitemaps.views.sitemap',
+]
+
 ROOT_URLCONF = 'journey.urls'
 
 TEMPLATES = [
@@ -91,11 +108,23 @@ DATABASES = {
     # DATABASE_POSTGRES: You can dump your database's data using 'python manage.py dumpdata --indent=2 --output=mysite_data.json'
     # DATABASE_POSTGRES: You can load your database's data using 'python manage.py loaddata mysite_data.json'
 
+    # ConnectionPool: journey.pooled_postgresql is the PostgreSQL backend with a connection pool. Connections are returned to the pool at the end of each request instead of being closed.
+    # MIN_SIZE connections are kept open when idle and at most MAX_SIZE are opened. A request waits up to TIMEOUT seconds for a free connection.
+    # Connections idle for CHECK_AFTER seconds are checked with SELECT 1 before use, idle connections are closed after MAX_IDLE seconds and every connection is replaced after MAX_LIFETIME seconds.
+    # Remove POOL to open a new connection for every request. Run 'python manage.py benchmark_db_pool' to compare both.
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'journey.pooled_postgresql',
         'NAME': os.getenv('POSTGRES_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '2')),
+            'MAX_SIZE': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10')),
+            'TIMEOUT': 5,
+            'CHECK_AFTER': 30,
+            'MAX_IDLE': 300,
+            'MAX_LIFETIME': 3600,
+        },
     },
 
     # 'default': {
@@ -106,6 +135,52 @@ DATABASES = {
 
 
 
+# AdminScaling: Set BLOG_ADMIN_SCALING=True in the environment to switch the admin to its scaling mode for very large Post and Comment tables.
+# The changelists then use estimated counts from the PostgreSQL statistics, full-text search on GIN indexes and cached filter choices.
+BLOG_ADMIN_SCALING = os.getenv('BLOG_ADMIN_SCALING', 'False') == 'True'
+BLOG_ADMIN_EXACT_COUNT_THRESHOLD = 10000
+BLOG_ADMIN_FILTER_CACHE_TIMEOUT = 60 * 15
+
+
+# Caching: Django uses a per-process local memory cache by default. With several worker processes each has its own copy, so cache invalidation only reaches one of them.
+# In production, point the default cache to a shared backend such as Redis ('django.core.cache.backends.redis.RedisCache') or Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# CommentPagination: Number of comments on each page of post_detail and how long the first page and the comment count stay cached.
+BLOG_COMMENTS_PER_PAGE = 20
+BLOG_COMMENTS_CACHE_TIMEOUT = 60 * 60
+
+# Caching: How long rendered Markdown and the sidebar values (post count, latest and most commented posts) stay cached.
+BLOG_MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_SIDEBAR_CACHE_TIMEOUT = 60 * 5
+
+# CacheWarming: Publishing or editing a post requests its pages again in the background. Run 'python manage.py warm_cache' after a deploy or a cache flush.
+# The pages are requested over HTTP from BLOG_WARMUP_BASE_URL, the address of the running site. This only warms every reader's cache with a shared cache backend (see CACHES).
+# BLOG_WARMUP_CONCURRENCY pages are requested at the same time, with a pause of BLOG_WARMUP_DELAY seconds after each one. A request gives up after BLOG_WARMUP_TIMEOUT seconds.
+BLOG_WARMUP_ON_PUBLISH = True
+BLOG_WARMUP_CONCURRENCY = 2
+BLOG_WARMUP_DELAY = 0.05
+BLOG_WARMUP_BASE_URL = os.getenv('BLOG_WARMUP_BASE_URL', 'http://localhost:8000')
+BLOG_WARMUP_TIMEOUT = 10
+
+# Prerendering: The cache warm-up sends this secret in the X-Blog-Prerender header so that its requests are not counted as reads.
+# Without it, the warm-up skips the post pages (post_detail), because every warm-up request for them would count as a read and favour recently edited posts in the "Most read posts" sidebar.
+BLOG_PRERENDER_TOKEN = os.getenv('BLOG_PRERENDER_TOKEN', '')
+
+# ViewCounting: Reads of post_detail are counted in memory and written to the database every BLOG_VIEW_FLUSH_INTERVAL seconds, or earlier when BLOG_VIEW_MAX_PENDING (post, day) pairs are pending.
+# If a process is killed without a graceful shutdown, at most BLOG_VIEW_FLUSH_INTERVAL seconds of its reads are lost.
+# The "Most read posts" sidebar sums the reads of the last BLOG_MOST_READ_DAYS days.
+# Counting is off while the tests run: the test runner points the database back to the real one before the exit handler flushes the last reads. Tests that need it turn it on with override_settings.
+BLOG_VIEW_COUNTING = sys.argv[1:2] != ['test']
+BLOG_VIEW_FLUSH_INTERVAL = 30
+BLOG_VIEW_MAX_PENDING = 1000
+BLOG_MOST_READ_DAYS = 7
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -19,6 +19,7 @@ from django.urls import path, include
 
 from django.contrib.sitemaps.views import sitemap
 from blogApplication.sitemaps import PostSitemap
+from journey.pooled_postgresql.views import pool_stats
 
 # The sitemaps dictionary is used to define the sitemaps for your site. The keys are the names of the sitemaps, and the values are the sitemap classes.
 sitemaps = {
@@ -32,4 +33,6 @@ urlpatterns = [
     path('blog/', include('blogApplication.urls',namespace='blogApplication')), 
     # The sitemap() function is a Django view that generates the sitemap XML file for your site. The sitemap view takes a dictionary of sitemaps as an argument.
     path('sitemap.xml/', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    # ConnectionPool: Statistics of the database connection pool (checkouts, waits, saturation) for staff users.
+    path('metrics/db-pool/', pool_stats, name='db_pool_stats'),
 ]